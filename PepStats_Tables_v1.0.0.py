@@ -1,16 +1,15 @@
 #!/usr/bin/env python3
-import platform
+# Modules used by some options only (tempfile, json, cProfile, platform) are imported where they are used, so that
+# the many small runs do not pay for them at startup
 import os
 import sys
 import shutil
 import argparse
-import subprocess
-import tempfile
+import atexit
 import datetime
 import locale
-import re
 from textwrap import dedent
-from packaging import version
+from pepstats_tables import run_pepstats_tables, run_pepstats_batch, list_batch_proteomes, format_stage_metrics, proteome_name, select_pepstats_columns, pepstats_field_names, pepstats_table_columns, find_executable
 
 # Defining Script Name
 script_name = os.path.basename(sys.argv[0])
@@ -39,7 +38,9 @@ WORK_EMAIL:                        raramayo@tamu.edu
 PERSONAL_EMAIL:                    rodolfo@aramayo.org
 """)
 
-usage = dedent(f"""
+# The usage text is built only when it is printed
+def usage():
+    return dedent(f"""
 ########################################################################################################################################################################################################
 ARAMAYO_LAB
 {copyright}
@@ -48,16 +49,40 @@ SCRIPT_NAME:                      {script_name}
 SCRIPT_VERSION:                   {script_version}
 
 USAGE: {script_name}
-       -p Homo_sapiens.GRCh38.pep.all.fa               # REQUIRED (Proteins File - Proteome)
+       -p Homo_sapiens.GRCh38.pep.all.fa               # REQUIRED (Proteins File - Proteome), or:
+       -B Proteomes Manifest or Glob                   # REQUIRED (Batch of Proteomes)
        -r PepStats_Tables                              # OPTIONAL (Run Name)
        -z TMPDIR Location                              # OPTIONAL (default=0='TMP TMPDIR Run')
+       -t Number of Threads                            # OPTIONAL (default=1)
+       -e Computation Engine                           # OPTIONAL (default=emboss)
+       -m Memory Ceiling in MB                         # OPTIONAL (default=256)
+       -c Result Cache Directory                       # OPTIONAL (default=no cache)
+       -s Result Cache Size in MB                      # OPTIONAL (default=4096)
+       -o Table_01 Output Format                       # OPTIONAL (default=tsv)
+       -R Resume Interrupted Run                       # OPTIONAL (default=off)
+       -n Proteins per Chunk                           # OPTIONAL (default=10000)
+       -M Metrics File                                 # OPTIONAL (default=no metrics file)
+       -P Profile the Analysis                         # OPTIONAL (default=off)
+       -Z Output Compression                           # OPTIONAL (default=none)
+       -I Write Binary Index                           # OPTIONAL (default=off)
+       -L Pipelined PepStats Run                       # OPTIONAL (default=off)
 
 TYPICAL COMMANDS:
                                    {script_name} -p Homo_sapiens.GRCh38.pep.all.fa -r PepStats_Tables
+                                   {script_name} -p Homo_sapiens.GRCh38.pep.all.fa -r PepStats_Tables -t 16
+                                   {script_name} -p Homo_sapiens.GRCh38.pep.all.fa -r PepStats_Tables -e native
+                                   {script_name} -p Homo_sapiens.GRCh38.pep.all.fa -r PepStats_Tables -c ~/PepStats_Cache
+                                   {script_name} -p Homo_sapiens.GRCh38.pep.all.fa -r PepStats_Tables -o parquet
+                                   {script_name} -p Homo_sapiens.GRCh38.pep.all.fa -r PepStats_Tables -t 16 -R
+                                   {script_name} -p Homo_sapiens.GRCh38.pep.all.fa.gz -r PepStats_Tables -Z gzip
+                                   zstd -dc Homo_sapiens.GRCh38.pep.all.fa.zst | {script_name} -p - -r PepStats_Tables
+                                   {script_name} -B 'Proteomes/*.pep.all.fa.gz' -r PepStats_Tables -t 32
 
 INPUT01:          -p FLAG          REQUIRED - Protein File
-INPUT01_FORMAT:                    Fasta Format
+INPUT01_FORMAT:                    Fasta Format (plain, gzip, bgzip or zstd compressed), or - to read standard input
 INPUT01_DEFAULT:                   No default
+INPUT01_NOTES:                     Compressed proteomes are decompressed while they are analyzed, without an uncompressed copy in the TMPDIR
+INPUT01_NOTES:                     Standard input is named stdin (stdin_<run_name>.dir) and cannot be used with -R or the validate engine
 
 INPUT02:          -r FLAG          OPTIONAL - Run Name
 INPUT02_FORMAT:                    Text
@@ -70,28 +95,165 @@ INPUT03_NOTES:                     0 Processes the data in the TMP $TMPDIR direc
 INPUT03_NOTES:                     Processing the data in the $TMPDIR directory of the node assigned by the SuperComputer scheduler reduces the possibility of file error generation due to network traffic
 INPUT03_NOTES:                     1 Processes the data in the same directory where the script is being run
 
+INPUT04:          -t FLAG          OPTIONAL input
+INPUT04_FORMAT:                    Numeric: Number of pepstats processes run in parallel
+INPUT04_DEFAULT:                   1
+INPUT04_NOTES:                     Values greater than 1 split the proteome into record-aligned shards that are analyzed in parallel
+INPUT04_NOTES:                     Shard results are merged in the original order, so the output files are identical to a single process run
+
+INPUT05:          -e FLAG          OPTIONAL input
+INPUT05_FORMAT:                    Text: emboss | native | validate
+INPUT05_DEFAULT:                   emboss
+INPUT05_NOTES:                     emboss Runs EMBOSS pepstats and extracts the table values from its report
+INPUT05_NOTES:                     native Computes the table values directly from the FASTA file with NumPy (no pepstats report is written)
+INPUT05_NOTES:                     validate Runs both engines, builds the tables from the EMBOSS values and reports every native value outside tolerance
+INPUT05_NOTES:                     (proteins are paired by Protein_ID; a protein missing from either engine is reported as a Protein_ID row)
+INPUT05_NOTES:                     Validation tolerances: Molecular_weight 0.05%, Isoelectric_Point 0.01, Mole% values 0.0015, residue numbers exact
+INPUT05_NOTES:                     Both engines name db|accession|name proteins after the last field of the header, as EMBOSS does
+
+INPUT06:          -m FLAG          OPTIONAL input
+INPUT06_FORMAT:                    Numeric: Memory ceiling in MB for the Table_02 transpose buffers
+INPUT06_DEFAULT:                   256
+INPUT06_NOTES:                     Table_02 is assembled from one spill file per column in the TMPDIR, so its memory use does not grow with the proteome size
+
+INPUT07:          -c FLAG          OPTIONAL input
+INPUT07_FORMAT:                    Directory holding the result cache (PepStats_Tables.cache.sqlite)
+INPUT07_DEFAULT:                   No cache
+INPUT07_NOTES:                     Results are keyed on the SHA-256 of each normalized sequence and on the engine (and EMBOSS) version
+INPUT07_NOTES:                     Only sequences missing from the cache are analyzed, so the main analysis file reports only those
+INPUT07_NOTES:                     Cached rows keep the Protein_ID pepstats reported for them, so cached and fresh runs give the same Table_01
+INPUT07_NOTES:                     Not available with the validate engine
+
+INPUT08:          -s FLAG          OPTIONAL input
+INPUT08_FORMAT:                    Numeric: Maximum size of the result cache in MB
+INPUT08_DEFAULT:                   4096
+INPUT08_NOTES:                     Least recently used results are evicted at the end of the run once the cache exceeds this size
+
+INPUT09:          -o FLAG          OPTIONAL input
+INPUT09_FORMAT:                    Text: tsv | parquet | arrow
+INPUT09_DEFAULT:                   tsv
+INPUT09_NOTES:                     parquet and arrow also write Table_01 as a typed .parquet or Arrow IPC (Feather V2) .arrow file next to the TSV tables
+INPUT09_NOTES:                     Protein_ID is dictionary encoded, Molecular_weight and Isoelectric_Point are float64, all other columns are float32
+INPUT09_NOTES:                     Rows are written in batches of 65536 proteins (one Parquet row group each) while the run progresses
+
+INPUT10:          -R FLAG          OPTIONAL input
+INPUT10_FORMAT:                    Flag (no value)
+INPUT10_DEFAULT:                   Off
+INPUT10_NOTES:                     Analyzes the proteome in chunks kept in the working directory (<proteome>_<run_name>.dir) and listed in a manifest file
+INPUT10_NOTES:                     Rerunning the same command with -R keeps the working directory, skips the chunks already completed and finalizes the tables
+INPUT10_NOTES:                     The chunks and the manifest are removed once the tables are written
+
+INPUT11:          -n FLAG          OPTIONAL input
+INPUT11_FORMAT:                    Numeric: Number of proteins per chunk of a resumable run
+INPUT11_DEFAULT:                   10000
+
+INPUT12:          -M FLAG          OPTIONAL input
+INPUT12_FORMAT:                    Path of a metrics file (.json: one JSON document per run, otherwise JSON lines appended, one per stage)
+INPUT12_DEFAULT:                   No metrics file
+INPUT12_NOTES:                     Wall time, CPU time, peak RSS, bytes read/written and records/sec of every stage are always written to the log
+INPUT12_NOTES:                     CPU time, peak RSS and bytes read/written include the pepstats processes once they finish (bytes: Linux only)
+INPUT12_NOTES:                     The extraction (native) stage is timed per record; table_01 excludes its time and bytes and includes the optional parquet/arrow copy
+INPUT12_NOTES:                     With -L the pepstats processes finish while table_01 is written, so their CPU time and bytes are counted under table_01
+
+INPUT13:          -P FLAG          OPTIONAL input
+INPUT13_FORMAT:                    Flag (no value)
+INPUT13_DEFAULT:                   Off
+INPUT13_NOTES:                     Writes a cProfile dump of the analysis (<proteome>_<run_name>.profile, readable with python -m pstats)
+
+INPUT14:          -Z FLAG          OPTIONAL input
+INPUT14_FORMAT:                    Text: gzip | zstd
+INPUT14_DEFAULT:                   No compression
+INPUT14_NOTES:                     Compresses the main analysis, Table_01, Table_02 and validation files (.gz or .zst appended to their names)
+
+INPUT15:          -B FLAG          REQUIRED instead of -p - Batch of Proteomes
+INPUT15_FORMAT:                    Manifest file (one proteome path per line, relative to the manifest, # for comments) or quoted glob pattern
+INPUT15_DEFAULT:                   No default
+INPUT15_NOTES:                     The proteomes are cut into pepstats work units run by one pool of -t processes: large proteomes are split and small ones packed
+INPUT15_NOTES:                     Every proteome gets its own <proteome>_<run_name>.dir with its log and tables, tabulated as soon as its last unit is done
+INPUT15_NOTES:                     Batch_<run_name>.dir holds the batch log and Batch_<run_name>.04_PepStats_Batch_Table_01, all Table_01 rows after a Proteome column
+INPUT15_NOTES:                     Proteome file names must be unique; not available with -R, -c or the validate engine
+
+INPUT16:          -I FLAG          OPTIONAL input
+INPUT16_FORMAT:                    Flag (no value)
+INPUT16_DEFAULT:                   Off
+INPUT16_NOTES:                     Also writes <proteome>_<run_name>.05_PepStats_Index: the Protein_IDs sorted as fixed-width strings and the numeric columns as float32
+INPUT16_NOTES:                     The index is memory mapped by pepstats_tables.PepStatsIndex for binary search lookups of single proteins or vectorized batches
+INPUT16_NOTES:                     Values reported as text (e.g. Isoelectric Point = None) are stored as NaN; the index is never compressed by -Z
+
+INPUT17:          -L FLAG          OPTIONAL input
+INPUT17_FORMAT:                    Flag (no value)
+INPUT17_DEFAULT:                   Off
+INPUT17_NOTES:                     Runs pepstats with its report going to a pipe (-outfile stdout) and extracts the records while pepstats is still running
+INPUT17_NOTES:                     The proteome is cut into work units of about 4 MB of FASTA run by -t pepstats processes and read in order through bounded queues
+INPUT17_NOTES:                     The main analysis file is written from the same stream, so the output files are identical to a normal run; ignored with -R and -B
+INPUT17_NOTES:                     The extraction needs a core of its own, so use -t below the number of cores available
+
+INPUT18:          -C FLAG          OPTIONAL input
+INPUT18_FORMAT:                    Text: Comma separated column names | default | all | list
+INPUT18_DEFAULT:                   default (the 32 v1.0.0 columns)
+INPUT18_NOTES:                     Selects the Table_01 columns (and Table_02 rows) in the given order, after Protein_ID; list prints the available columns and exits
+INPUT18_NOTES:                     Only the report lines holding selected columns are split, so smaller selections extract faster and write smaller tables
+INPUT18_NOTES:                     Beyond the v1.0.0 columns: Residues, Average_Residue_Weight, Charge, the A280 extinction coefficients, the inclusion bodies
+INPUT18_NOTES:                     (im)probability, and Number_<residue>, Residue_Mole%_<residue> and DayhoffStat_<residue> of every residue and Number_<property>
+INPUT18_NOTES:                     The v1.0.0 Mole%_<residue> columns keep their v1.0.0 values (counts, except Mole%_Ala); values missing from a report are NA
+INPUT18_NOTES:                     The native engine computes the v1.0.0 columns only
+
+INPUT19:          -D FLAG          OPTIONAL input
+INPUT19_FORMAT:                    Two files: Table_01 and FASTA proteome of the previous release (either may be compressed)
+INPUT19_DEFAULT:                   No previous release
+INPUT19_NOTES:                     Matches the proteins by Protein_ID and sequence digest: the rows of sequences already in the previous release are reused
+INPUT19_NOTES:                     and only the new sequences are analyzed, so the main analysis file holds their report only
+INPUT19_NOTES:                     Also writes <proteome>_<run_name>.06_PepStats_Delta: Protein_ID, Status, Column, Previous_Value and Value of the added and removed
+INPUT19_NOTES:                     proteins, and of the changed proteins their sequence digests and every value that differs
+INPUT19_NOTES:                     The previous release must have been analyzed by the same engine and EMBOSS version; not available with -B, -R, -c or validate
+
+INPUT20:          -Q FLAG          OPTIONAL input
+INPUT20_FORMAT:                    Flag (no value)
+INPUT20_DEFAULT:                   Off
+INPUT20_NOTES:                     Screens the proteins before the analysis: no Protein_ID, an empty sequence or characters other than residue letters (e.g. * or -)
+INPUT20_NOTES:                     A failed pepstats run (or shard with -t) is retried in isolation, halving its proteins down to the single proteins that fail
+INPUT20_NOTES:                     Every record is checked during the extraction: matched to its protein, with every report line present and numeric values
+INPUT20_NOTES:                     Quarantined proteins are left out of the tables and written to <proteome>_<run_name>.07_PepStats_Quarantine (Protein_ID, Stage, Reason)
+INPUT20_NOTES:                     The log ends with a summary of the proteins tabulated and quarantined; not available with -B or -R, and -L is ignored
+
 DEPENDENCIES:                      EMBOSS:        Required (see: http://emboss.open-bio.org/html/adm/ch01s01.html)
+                                   NumPy:         Required for the native and validate engines and the binary index (see: https://numpy.org/install/)
+                                   PyArrow:       Required for the parquet and arrow output formats (see: https://arrow.apache.org/install/)
+                                   zstandard:     Optional for zstd input and output, otherwise the zstd command is used (see: https://pypi.org/project/zstandard/)
 
 {authors}
 ########################################################################################################################################################################################################
 """)
-# print (usage)
+# print (usage())
 
 def error_handling_function():
     print("An error occurred. Invoking the error handling function.")
-    print (usage)
+    print (usage())
     sys.exit(1)
 
+# -C list prints the available columns and exits while the arguments are parsed, as -v does
+class ColumnsAction(argparse.Action):
+    def __call__(self, parser, namespace, values, option_string=None):
+        if values == "list":
+            print('\n'.join(pepstats_field_names))
+            parser.exit()
+        setattr(namespace, self.dest, values)
+
 def setup_argparse():
     parser = argparse.ArgumentParser(
       description='Script Description and Usage',
       formatter_class=argparse.RawTextHelpFormatter
     )
-    parser.add_argument(
+    proteome_input = parser.add_mutually_exclusive_group(required=True)
+    proteome_input.add_argument(
       '-p', '--proteome',
-      required=True,
       help='Proteins File - Proteome'
     )
+    proteome_input.add_argument(
+      '-B',
+      '--batch',
+      help='Batch of Proteomes - Manifest File or Glob Pattern'
+    )
     parser.add_argument(
       '-r',
       '--run_name',
@@ -106,6 +268,113 @@ def setup_argparse():
       default=0,
       help='TMPDIR Location (0 for TMP TMPDIR Run, 1 for Local TMPDIR Run)'
     )
+    parser.add_argument(
+      '-t',
+      '--threads',
+      type=int,
+      default=1,
+      help='Number of pepstats processes run in parallel (default 1)'
+    )
+    parser.add_argument(
+      '-e',
+      '--engine',
+      choices=['emboss', 'native', 'validate'],
+      default='emboss',
+      help='Computation engine (emboss, native, or validate to compare native against emboss)'
+    )
+    parser.add_argument(
+      '-m',
+      '--max_memory',
+      type=int,
+      default=256,
+      help='Memory ceiling in MB for the Table_02 transpose buffers (default 256)'
+    )
+    parser.add_argument(
+      '-c',
+      '--cache_dir',
+      default=None,
+      help='Result cache directory (default no cache)'
+    )
+    parser.add_argument(
+      '-s',
+      '--cache_size',
+      type=int,
+      default=4096,
+      help='Maximum result cache size in MB (default 4096)'
+    )
+    parser.add_argument(
+      '-o',
+      '--output_format',
+      choices=['tsv', 'parquet', 'arrow'],
+      default='tsv',
+      help='Additional typed Table_01 output format (default tsv only)'
+    )
+    parser.add_argument(
+      '-R',
+      '--resume',
+      action='store_true',
+      help='Run in resumable chunks, skipping the chunks completed by a previous run'
+    )
+    parser.add_argument(
+      '-n',
+      '--chunk_size',
+      type=int,
+      default=10000,
+      help='Number of proteins per chunk of a resumable run (default 10000)'
+    )
+    parser.add_argument(
+      '-M',
+      '--metrics_file',
+      type=str,
+      default=None,
+      help='Write the per-stage metrics to this JSON (.json) or JSON lines file'
+    )
+    parser.add_argument(
+      '-P',
+      '--profile',
+      action='store_true',
+      help='Write a cProfile dump of the analysis to the working directory'
+    )
+    parser.add_argument(
+      '-Z',
+      '--compress_output',
+      choices=['gzip', 'zstd'],
+      default=None,
+      help='Compress the main analysis and table files (default none)'
+    )
+    parser.add_argument(
+      '-I',
+      '--binary_index',
+      action='store_true',
+      help='Also write a memory-mappable binary index of Table_01'
+    )
+    parser.add_argument(
+      '-L',
+      '--pipelined',
+      action='store_true',
+      help='Extract the records while pepstats is running'
+    )
+    parser.add_argument(
+      '-C',
+      '--columns',
+      action=ColumnsAction,
+      default=None,
+      help='Comma separated Table_01 columns, default, all, or list to print the available columns (default v1.0.0 columns)'
+    )
+    parser.add_argument(
+      '-D',
+      '--previous',
+      nargs=2,
+      metavar=('TABLE_01', 'FASTA'),
+      default=None,
+      help='Table_01 and FASTA proteome of the previous release, to analyze only the new sequences and write a delta table'
+    )
+    parser.add_argument(
+      '-Q',
+      '--quarantine',
+      action='store_true',
+      help='Quarantine malformed or failed proteins instead of failing or corrupting the run'
+    )
     parser.add_argument(
       '-v',
       '--version',
@@ -115,13 +384,13 @@ def setup_argparse():
     )
     return parser
 
-# Check if no arguments were provided
-if len(sys.argv) == 1:
-    print("\nPlease enter required arguments")
-    print (usage)
-    sys.exit(1)
-
 def main():
+    # Check if no arguments were provided
+    if len(sys.argv) == 1:
+        print("\nPlease enter required arguments")
+        print (usage())
+        sys.exit(1)
+
     parser = setup_argparse()
 
     args = parser.parse_args()  # This line parses the command-line arguments
@@ -131,11 +400,23 @@ def main():
     # for arg in vars(args):
     #     print(f"{arg}: {getattr(args, arg)}")
 
+    # Batch runs write their log and combined table to Batch_<run_name>.dir, next to one directory per proteome
+    batch = (args.batch)
+    if batch is not None:
+        try:
+            batch_proteome_files = list_batch_proteomes(batch)
+        except ValueError as error:
+            parser.error(f"argument -B/--batch: {error}")
+    # print(f"Batch: {batch}") # test_print_var
+
     # Extract and print the name of the protein file
-    proteome_file_name = os.path.basename(args.proteome)
+    if batch is not None:
+        proteome_file_name = "Batch"
+    else:
+        proteome_file_name = "stdin" if args.proteome == "-" else os.path.basename(args.proteome)
     # print(f"Proteome File Name: {proteome_file_name}") # test_print_var
 
-    proteome, _ = os.path.splitext(proteome_file_name)
+    proteome = "Batch" if batch is not None else proteome_name(args.proteome)
     # print(f"Proteome Name: {proteome}") # test_print_var
 
     run_name = os.path.basename(args.run_name)
@@ -144,6 +425,74 @@ def main():
     tmp_dir = (args.tmp_dir)
     # print(f"TMP dir: {tmp_dir}") # test_print_var
 
+    threads = (args.threads)
+    if threads < 1:
+        parser.error("argument -t/--threads: must be 1 or greater")
+    # print(f"Threads: {threads}") # test_print_var
+
+    engine = (args.engine)
+    # print(f"Engine: {engine}") # test_print_var
+
+    max_memory = (args.max_memory)
+    if max_memory < 1:
+        parser.error("argument -m/--max_memory: must be 1 or greater")
+    # print(f"Memory Ceiling: {max_memory}") # test_print_var
+
+    cache_dir = (args.cache_dir)
+    cache_size = (args.cache_size)
+    if cache_dir is not None and engine == "validate":
+        parser.error("argument -c/--cache_dir: not allowed with the validate engine")
+    # print(f"Cache Directory: {cache_dir}") # test_print_var
+
+    output_format = (args.output_format)
+    # print(f"Output Format: {output_format}") # test_print_var
+
+    resume = (args.resume)
+    chunk_size = (args.chunk_size)
+    if chunk_size < 1:
+        parser.error("argument -n/--chunk_size: must be 1 or greater")
+    # print(f"Resume: {resume}") # test_print_var
+
+    if batch is not None and (resume or cache_dir is not None or engine == "validate"):
+        parser.error("argument -B/--batch: not allowed with -R, -c or the validate engine")
+    if args.proteome == "-" and (resume or engine == "validate"):
+        parser.error("argument -p/--proteome: standard input (-) is read once, so it is not allowed with -R or the validate engine")
+
+    compress_output = (args.compress_output)
+    # print(f"Output Compression: {compress_output}") # test_print_var
+
+    binary_index = (args.binary_index)
+    # print(f"Binary Index: {binary_index}") # test_print_var
+
+    pipelined = (args.pipelined)
+    # print(f"Pipelined: {pipelined}") # test_print_var
+
+    try:
+        columns = select_pepstats_columns(args.columns)
+    except ValueError as error:
+        parser.error(f"argument -C/--columns: {error}")
+    if engine == "native" and not set(columns) <= set(pepstats_table_columns):
+        parser.error("argument -C/--columns: the native engine computes the v1.0.0 columns only")
+    # print(f"Columns: {columns}") # test_print_var
+
+    previous = (args.previous)
+    if previous is not None:
+        if batch is not None or resume or cache_dir is not None or engine == "validate":
+            parser.error("argument -D/--previous: not allowed with -B, -R, -c or the validate engine")
+        for previous_file in previous:
+            if not os.path.isfile(previous_file):
+                parser.error(f"argument -D/--previous: file not found: {previous_file}")
+    # print(f"Previous Release: {previous}") # test_print_var
+
+    quarantine = (args.quarantine)
+    if quarantine and (batch is not None or resume):
+        parser.error("argument -Q/--quarantine: not allowed with -B or -R")
+    # print(f"Quarantine: {quarantine}") # test_print_var
+
+    metrics_file = (args.metrics_file)
+    profile = (args.profile)
+    # print(f"Metrics File: {metrics_file}") # test_print_var
+
     # Construct the directory path
     current_working_directory = os.getcwd()
     # print(f"Current Working Directory:", current_working_directory) # test_print_var
@@ -154,27 +503,33 @@ def main():
     working_directory_name = f"{proteome_file_name}_{run_name}.dir"
     # print(f"Working Directory Name: {working_directory_name}") # test_print_var
 
-    # Check if the working directory exists
-    if not os.path.isdir(working_directory_name):
-        # If the directory does not exist, create it
-        os.makedirs(working_directory_name)
-    else:
-        # If the directory exists, remove its contents
-        for filename in os.listdir(working_directory_name):
-            file_path = os.path.join(working_directory_name, filename)
-            try:
-                # If it's a file, remove it
-                if os.path.isfile(file_path) or os.path.islink(file_path):
-                    os.unlink(file_path)
-                # If it's a directory, remove it and all its contents
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-            except Exception as e:
-                print(f'Failed to delete {file_path}. Reason: {e}')
+    def generate_or_clean_working_directory(working_directory_name):
+        # Check if the working directory exists
+        if not os.path.isdir(working_directory_name):
+            # If the directory does not exist, create it
+            os.makedirs(working_directory_name)
+        elif resume:
+            # Resumable runs keep the chunks completed by a previous run
+            pass
+        else:
+            # If the directory exists, remove its contents
+            for filename in os.listdir(working_directory_name):
+                file_path = os.path.join(working_directory_name, filename)
+                try:
+                    # If it's a file, remove it
+                    if os.path.isfile(file_path) or os.path.islink(file_path):
+                        os.unlink(file_path)
+                    # If it's a directory, remove it and all its contents
+                    elif os.path.isdir(file_path):
+                        shutil.rmtree(file_path)
+                except Exception as e:
+                    print(f'Failed to delete {file_path}. Reason: {e}')
+
+    generate_or_clean_working_directory(working_directory_name)
 
     def generate_or_clean_tmp_directory(proteome, run_name, tmp_dir):
-        global var_script_tmp_data_dir
         if tmp_dir == 0:
+            import tempfile
             # Use system TMPDIR if defined, else use a temporary directory
             base_dir = os.getenv('TMPDIR', None)
             if base_dir is not None:
@@ -201,7 +556,9 @@ def main():
 
             # print(f"Temporary directory created at: {var_script_tmp_data_dir}") # test_print_var
 
-    generate_or_clean_tmp_directory(proteome, run_name, tmp_dir)
+        return var_script_tmp_data_dir
+
+    var_script_tmp_data_dir = generate_or_clean_tmp_directory(proteome, run_name, tmp_dir)
 
     # Define the directory and log file path
     log_dir = f"./{proteome_file_name}_{run_name}.dir"
@@ -213,21 +570,29 @@ def main():
     # Initialize log file and record start time
     time_execution_start = datetime.datetime.now()
 
-    # Writing the starting entry to the log file
-    with open(log_file_path, 'w') as log_file:
-      log_file.write(f"Starting Processing Proteome: {proteome_file_name} on: {time_execution_start}\n")
+    # Writing the starting entry to the log file (resumable runs append to the log of the previous attempt). The log
+    # file stays open until the end of the run; it is flushed at the end of every stage, so that it can be followed
+    # while the run progresses, and closed on every exit
+    log_file = open(log_file_path, 'a' if resume else 'w')
+    atexit.register(log_file.close)
+    log_file.write(f"Starting Processing Proteome: {proteome_file_name} on: {time_execution_start}\n")
 
     # Function to append messages to the log file
     def append_to_log(message):
-        with open(log_file_path, 'a') as log_file:
-          log_file.write(message + "\n")
+        log_file.write(message + "\n")
 
     # Verifying Software Dependency Existence
     append_to_log(f"Verifying Software Dependency Existence on: " + datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
 
-    # Determining Current Computer Platform
-    osname = platform.system()
-    cputype = platform.machine()
+    # Determining Current Computer Platform (os.uname gives the values of platform.system and platform.machine,
+    # and is missing on Windows only)
+    if hasattr(os, "uname"):
+        osname = os.uname().sysname
+        cputype = os.uname().machine
+    else:
+        import platform
+        osname = platform.system()
+        cputype = platform.machine()
     plt = ""
     if osname == "Linux" and cputype == "x86_64":
       plt = "Linux"
@@ -245,13 +610,13 @@ def main():
     append_to_log(f"Detected Platform: {plt}")
 
     # Determining Python Version (as a stand-in for checking Bash version)
-    python_version = platform.python_version()
+    python_version = "{}.{}.{}".format(*sys.version_info[:3])
     required_version = "3.6"  # Example required version
 
     append_to_log(f"Available Python Version: {python_version}")
     append_to_log(f"Required Minimal Python Version: {required_version}")
 
-    if version.parse(python_version) >= version.parse(required_version):
+    if sys.version_info >= (3, 6):
       append_to_log(f"Python version {python_version} is installed.")
     else:
       append_to_log(f"Python version 3.6 or higher is not installed.")
@@ -259,20 +624,18 @@ def main():
       # Exit the script if the required Python version is not installed
       sys.exit(1)
 
-    # Check for pepstats installation
+    # Check for pepstats installation (searched in PATH in process, once)
     def check_dependency(command):
-        #original_path = os.environ['PATH']
-        #os.environ['PATH'] += os.pathsep + '/opt/local/bin'  # Ensure this is the correct path for pepstats
-        result = subprocess.run(["which", command], capture_output=True, text=True)
-        #os.environ['PATH'] = original_path  # Reset PATH to original value
-        return result.returncode == 0
+        return find_executable(command) is not None
 
     # Append dependency check results to log
-    if check_dependency("pepstats"):
+    if engine == "native":
+      append_to_log(f"PepStats is Not Required (native engine)")
+    elif check_dependency("pepstats"):
       append_to_log(f"PepStats is Installed")
     else:
       append_to_log(f"EMBOSS pepstats is Not Installed")
-      print (usage)
+      print (usage())
       # Handle the error as needed, perhaps by calling a custom `func_usage` function or exiting
       sys.exit("Please install EMBOSS PepStats.")
 
@@ -285,9 +648,13 @@ def main():
     locale.setlocale(locale.LC_ALL, 'C')  # Affects the current Python process
 
     # Writing command issued and other details to the log
-    append_to_log(f"\nCommand Issued Was: {script_name} -p {proteome} -r {run_name} -z {tmp_dir}")
-    append_to_log(f"\tProteome Analyzed:\t{proteome_file_name}")
-    append_to_log(f"\tFile Type:\t\tProteome")
+    append_to_log(f"\nCommand Issued Was: {script_name} " + (f"-B {batch}" if batch is not None else f"-p {proteome}") + f" -r {run_name} -z {tmp_dir} -t {threads} -e {engine} -m {max_memory} -o {output_format}" + (f" -c {cache_dir} -s {cache_size}" if cache_dir is not None else "") + (f" -R -n {chunk_size}" if resume else "") + (f" -M {metrics_file}" if metrics_file is not None else "") + (" -P" if profile else "") + (f" -Z {compress_output}" if compress_output is not None else "") + (" -I" if binary_index else "") + (" -L" if pipelined else "") + (f" -C {args.columns}" if args.columns is not None else "") + (f" -D {' '.join(previous)}" if previous is not None else "") + (" -Q" if quarantine else ""))
+    if batch is not None:
+        append_to_log(f"\tProteomes Analyzed:\t{len(batch_proteome_files)}")
+        append_to_log(f"\tFile Type:\t\tBatch of Proteomes")
+    else:
+        append_to_log(f"\tProteome Analyzed:\t{proteome_file_name}")
+        append_to_log(f"\tFile Type:\t\tProteome")
 
     # Conditionally writing TMPDIR information based on tmp_dir
     if tmp_dir == 0:
@@ -297,182 +664,91 @@ def main():
         append_to_log(f"\tTMPDIR Requested:\tLocal TMPDIR Run")
         append_to_log(f"\tTMPDIR Created at:\t{var_script_tmp_data_dir}")
 
-    # Construct the output file path
-    output_file_path = os.path.join(var_script_tmp_data_dir, f"001_{proteome}.out")
-
-    # Check if the file does not exist or is empty
-    if not os.path.isfile(output_file_path) or os.path.getsize(output_file_path) == 0:
-    # Construct the pepstats command
-        pepstats_command = [
-            "pepstats",
-            "-sequence", f"{proteome_file_name}",
-            "-outfile", output_file_path
-        ]
-
-    # Execute the command, suppressing stderr
-    with open(os.devnull, 'w') as devnull:
-        subprocess.run(pepstats_command, stderr=devnull)
-
-    # File and file paths
-    file_001 = os.path.join(var_script_tmp_data_dir, f"001_{proteome}.out")
-    file_002 = os.path.join(var_script_tmp_data_dir, f"002_{proteome}.out")
-    file_003 = os.path.join(var_script_tmp_data_dir, f"003_{proteome}.out")
-    file_004 = os.path.join(var_script_tmp_data_dir, f"004_{proteome}.out")
-    file_005 = os.path.join(var_script_tmp_data_dir, f"005_{proteome}.out")
-    file_006 = os.path.join(var_script_tmp_data_dir, f"006_{proteome}.out")
-    file_007 = os.path.join(var_script_tmp_data_dir, f"007_{proteome}.out")
-    file_008 = os.path.join(var_script_tmp_data_dir, f"008_{proteome}.out")
-
-    # Define regex patterns for each condition
-    patterns = [
-        (re.compile(r"PEPSTATS"), 3),
-        (re.compile(r"Molecular weight"), 4),
-        (re.compile(r"Isoelectric Point ="), -1),
-        (re.compile(r"A = Ala"), 5),
-        (re.compile(r"C = Cys"), 4),
-        (re.compile(r"D = Asp"), 4),
-        (re.compile(r"E = Glu"), 4),
-        (re.compile(r"F = Phe"), 4),
-        (re.compile(r"G = Gly"), 4),
-        (re.compile(r"H = His"), 4),
-        (re.compile(r"A = Ala"), 4),
-        (re.compile(r"I = Ile"), 4),
-        (re.compile(r"K = Lys"), 4),
-        (re.compile(r"L = Leu"), 4),
-        (re.compile(r"M = Met"), 4),
-        (re.compile(r"N = Asn"), 4),
-        (re.compile(r"P = Pro"), 4),
-        (re.compile(r"Q = Gln"), 4),
-        (re.compile(r"R = Arg"), 4),
-        (re.compile(r"S = Ser"), 4),
-        (re.compile(r"T = Thr"), 4),
-        (re.compile(r"V = Val"), 4),
-        (re.compile(r"W = Trp"), 4),
-        (re.compile(r"Y = Tyr"), 4),
-        (re.compile(r"Tiny"), -1),
-        (re.compile(r"Small"), -1),
-        (re.compile(r"Aliphatic"), -1),
-        (re.compile(r"Aromatic"), -1),
-        (re.compile(r"Non-polar"), -1),
-        (re.compile(r"Polar"), -1),
-        (re.compile(r"Charged"), -1),
-        (re.compile(r"Basic"), -1),
-        (re.compile(r"Acidic"), -1),
-    ]
-
-    nl = False
-
-    with open(file_001, 'r') as input_file, open(file_002, 'w') as output_file:
-        for line in input_file:
-            for pattern, field_index in patterns:
-                if pattern.search(line):
-                    words = line.split()
-                    if nl:
-                        output_file.write("\n")
-                    else:
-                        nl = True
-
-                    # Handle the case where field_index is -1 (i.e., use the last field)
-                    if field_index == -1:
-                        field_index = len(words)
-                    output_file.write(f"{words[field_index - 1]} ")
-                    break  # Move to the next line after a match
-
-        # Print a final newline at the end of the file
-        output_file.write("\n")
-
-    # Format and combine data from file_002 and file_001 into file_003
-    # Number of lines in each entry, including the identifier line
-    lines_per_entry = 32
-
-    def process_file(file_002, file_003):
-        with open(file_002, 'r') as input_file, open(file_003, 'w') as output_file:
-            # Initialize a counter to track the number of lines processed for the current entry
-            line_count = 0
-            # Initialize a list to accumulate lines for the current entry
-            current_entry_lines = []
-
-            for line in input_file:
-                # Strip leading/trailing whitespace
-                line = line.strip()
-                # Skip empty lines if they are not expected within an entry
-                if not line:
-                    continue
-
-                # Add the current line to the entry's lines
-                current_entry_lines.append(line)
-                line_count += 1
-
-                # Check if we've accumulated all lines for the current entry
-                if line_count == lines_per_entry:
-                    # Join the lines with a tab separator and write to the output file
-                    output_file.write('\t'.join(current_entry_lines) + '\n')
-                    # Reset the counter and the list for the next entry
-                    line_count = 0
-                    current_entry_lines = []
-
-            # Handle the last entry if the file doesn't end with a full set of lines_per_entry
-            # This step may be unnecessary if each entry is guaranteed to have exactly lines_per_entry lines
-            if current_entry_lines:
-                output_file.write('\t'.join(current_entry_lines) + '\n')
-
-    process_file(file_002, file_003)
-
-    # Create a header row and write it to file_004
-    header = "Protein_ID\tMolecular_weight\tIsoelectric_Point\t" \
-              "Mole%_Ala\tMole%_Cys\tMole%_Asp\tMole%_Glu\tMole%_Phe\tMole%_Gly\tMole%_His\tMole%_Ile\tMole%_Lys\tMole%_Leu\t" \
-              "Mole%_Met\tMole%_Asn\tMole%_Pro\tMole%_Gln\tMole%_Arg\tMole%_Ser\tMole%_Thr\tMole%_Val\tMole%_Trp\tMole%_Tyr\t" \
-              "Mole%_Tiny\tMole%_Small\tMole%_Aliphatic\tMole%_Aromatic\tMole%_Non-polar\tMole%_Polar\tMole%_Charged\tMole%_Basic\tMole%_Acidic\n"
-    with open(file_004, 'w') as f_header:
-        f_header.write(header)
-
-    # Concatenate file_004 and file_003 into file_005
-    with open(file_005, 'w') as f_final, open(file_004, 'r') as f_header, open(file_003, 'r') as f_data:
-        f_final.write(f_header.read())
-        f_final.write(f_data.read())
-
-    def transpose_entries(file_002, file_006, lines_per_entry):
-        # Read all lines from the input file and group them
-        with open(file_002, 'r') as file:
-            lines = file.read().strip().split('\n')
-
-        # Group every lines_per_entry lines into an entry
-        entries = [lines[i:i + lines_per_entry] for i in range(0, len(lines), lines_per_entry)]
-
-        # Transpose the list of entries
-        transposed = list(zip(*entries))
-
-        # Write the transposed lines to the output file, separating entries with tabs
-        with open(file_006, 'w') as file:
-            for line_group in transposed:
-                file.write('\t'.join(line_group) + '\n')
-
-    transpose_entries(file_002, file_006, lines_per_entry)
-
-        # Create a column row and write it to file_007
-    column = "Protein_ID\nMolecular_weight\nIsoelectric_Point\n" \
-              "Mole%_Ala\nMole%_Cys\nMole%_Asp\nMole%_Glu\nMole%_Phe\nMole%_Gly\nMole%_His\nMole%_Ile\nMole%_Lys\nMole%_Leu\n" \
-              "Mole%_Met\nMole%_Asn\nMole%_Pro\nMole%_Gln\nMole%_Arg\nMole%_Ser\nMole%_Thr\nMole%_Val\nMole%_Trp\nMole%_Tyr\n" \
-              "Mole%_Tiny\nMole%_Small\nMole%_Aliphatic\nMole%_Aromatic\nMole%_Non-polar\nMole%_Polar\nMole%_Charged\nMole%_Basic\nMole%_Acidic\n"
-    with open(file_007, 'w') as f_column:
-        f_column.write(column)
-
-    # Open file_008 for writing, and file_007 and file_006 for reading
-    with open(file_008, 'w') as f_final, open(file_007, 'r') as f_header, open(file_006, 'r') as f_data:
-        # Iterate over the lines of file_007 and file_006 simultaneously
-        for header_line, data_line in zip(f_header, f_data):
-            # Strip newline characters and concatenate the lines with a tab in between
-            combined_line = header_line.strip() + '\t' + data_line.strip() + '\n'
-            # Write the combined line to file_008
-            f_final.write(combined_line)
-
-    main_pepstats_run = os.path.join(log_dir, f"{proteome_file_name}_{run_name}.00_Main_PepStats_Analysis")
-    table_01_pepstats_run = os.path.join(log_dir, f"{proteome_file_name}_{run_name}.01_PepStats_Table_01")
-    table_02_pepstats_run = os.path.join(log_dir, f"{proteome_file_name}_{run_name}.02_PepStats_Table_02")
-
-    shutil.move(file_001, main_pepstats_run)
-    shutil.move(file_005, table_01_pepstats_run)
-    shutil.move(file_008, table_02_pepstats_run)
+    append_to_log(f"\tPepStats Threads:\t{threads}")
+    append_to_log(f"\tEngine:\t\t\t{engine}")
+    append_to_log(f"\tMemory Ceiling:\t\t{max_memory} MB")
+    append_to_log(f"\tOutput Format:\t\t{output_format}")
+    if compress_output is not None:
+        append_to_log(f"\tOutput Compression:\t{compress_output}")
+    append_to_log(f"\tTable Columns:\t\t{len(columns)}")
+    if cache_dir is not None:
+        append_to_log(f"\tResult Cache:\t\t{cache_dir} ({cache_size} MB)")
+
+    # Run the analysis, writing the results next to the log file and the metrics of every stage to the log
+    output_prefix = os.path.join(log_dir, f"{proteome_file_name}_{run_name}")
+    stage_metrics = []
+    def record_stage(metrics):
+        stage_metrics.append(metrics)
+        append_to_log(format_stage_metrics(metrics))
+        log_file.flush()
+        for proteome_log_file in proteome_log_files:
+            proteome_log_file.flush()
+
+    # Each proteome of a batch gets its own working directory and log
+    proteome_log_files = []
+    def open_proteome_log(proteome_file):
+        proteome_dir = f"./{os.path.basename(proteome_file)}_{run_name}.dir"
+        generate_or_clean_working_directory(proteome_dir)
+        proteome_log_file_path = os.path.join(proteome_dir, f"{os.path.basename(proteome_file)}_{run_name}.log")
+        proteome_log_file = open(proteome_log_file_path, 'w')
+        atexit.register(proteome_log_file.close)
+        proteome_log_files.append(proteome_log_file)
+        proteome_log_file.write(f"Starting Processing Proteome: {os.path.basename(proteome_file)} on: {datetime.datetime.now()}\n")
+        proteome_log_file.write(f"Batch Run Log: {log_file_path}\n")
+        def append_to_proteome_log(message):
+            proteome_log_file.write(message + "\n")
+        return os.path.join(proteome_dir, f"{os.path.basename(proteome_file)}_{run_name}"), append_to_proteome_log
+
+    if profile:
+        import cProfile
+    profiler = cProfile.Profile() if profile else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        if batch is not None:
+            batch_output_prefixes, batch_proteome_logs = zip(*[open_proteome_log(proteome_file) for proteome_file in batch_proteome_files])
+            run_pepstats_batch(
+                batch_proteome_files, batch_output_prefixes, output_prefix, var_script_tmp_data_dir,
+                engine=engine, threads=threads, max_memory=max_memory, output_format=output_format,
+                output_compression=compress_output, binary_index=binary_index, columns=columns,
+                log=append_to_log, proteome_logs=batch_proteome_logs, stage_report=record_stage,
+            )
+            for append_to_proteome_log in batch_proteome_logs:
+                append_to_proteome_log(f"\nFinishing Processing Proteome on: {datetime.datetime.now()}")
+            for proteome_log_file in proteome_log_files:
+                proteome_log_file.close()
+        else:
+            run_pepstats_tables(
+                args.proteome, output_prefix, var_script_tmp_data_dir,
+                engine=engine, threads=threads, max_memory=max_memory,
+                cache_dir=cache_dir, cache_size=cache_size, output_format=output_format,
+                resume=resume, chunk_size=chunk_size,
+                log=append_to_log, stage_report=record_stage, output_compression=compress_output,
+                binary_index=binary_index, pipelined=pipelined, columns=columns, previous=previous,
+                quarantine=quarantine,
+            )
+    except (ImportError, ValueError, RuntimeError) as error:
+        sys.exit(str(error))
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+    if profiler is not None:
+        profiler.dump_stats(f"{output_prefix}.profile")
+        append_to_log(f"\tProfile Written to:\t{output_prefix}.profile")
+
+    if metrics_file is not None:
+        import json
+        run_metrics = {"proteome": proteome_file_name, "run_name": run_name, "engine": engine, "threads": threads, "started": str(time_execution_start)}
+        if metrics_file.endswith(".json"):
+            with open(metrics_file, 'w') as output_file:
+                json.dump(dict(run_metrics, stages=stage_metrics), output_file, indent=2)
+                output_file.write("\n")
+        else:
+            with open(metrics_file, 'a') as output_file:
+                for metrics in stage_metrics:
+                    output_file.write(json.dumps(dict(run_metrics, **metrics)) + "\n")
+        append_to_log(f"\tMetrics Written to:\t{metrics_file}")
 
     # Remove the TMPDIR directory and all its contents
     shutil.rmtree(var_script_tmp_data_dir)
@@ -484,11 +760,11 @@ def main():
     execution_duration_hours = execution_duration_minutes / 60
 
     # Writing the closing entry to the log file
-    with open(log_file_path, 'a') as log_file:  # Open in append mode to add to the file
-      log_file.write(f"\nFinishing Processing proteome {proteome} on: {time_execution_stop}\n")
-      log_file.write(f"Script Runtime: {execution_duration_seconds} seconds\n")
-      log_file.write(f"Script Runtime: {execution_duration_minutes:.2f} minutes\n")
-      log_file.write(f"Script Runtime: {execution_duration_hours:.2f} hours\n")
+    log_file.write(f"\nFinishing Processing proteome {proteome} on: {time_execution_stop}\n")
+    log_file.write(f"Script Runtime: {execution_duration_seconds} seconds\n")
+    log_file.write(f"Script Runtime: {execution_duration_minutes:.2f} minutes\n")
+    log_file.write(f"Script Runtime: {execution_duration_hours:.2f} hours\n")
+    log_file.close()
 
 if __name__ == "__main__":
     main()
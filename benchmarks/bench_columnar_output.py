@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# Parquet and Arrow IPC copies of Table_01 (-o) on a synthetic table spanning several record batches, read back and
+# checked against the records written (Protein_IDs, row count and a numeric column)
+#
+# USAGE: python3 benchmarks/bench_columnar_output.py [-n 200000] [-b 65536]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import pepstats_tables
+from bench_table02_memory import synthetic_records
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar output benchmark")
+    parser.add_argument('-n', '--proteins', type=int, default=200000, help='Number of synthetic proteins (default 200000)')
+    parser.add_argument('-b', '--batch', type=int, default=65536, help='Records per row group or record batch (default 65536)')
+    args = parser.parse_args()
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    records = list(synthetic_records(args.proteins))
+    print(f"Proteins:              {args.proteins} ({-(-args.proteins // args.batch)} batches of {args.batch})")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for output_format in ("parquet", "arrow"):
+            output_file = os.path.join(tmp_dir, f"Table_01.{output_format}")
+            time_start = time.perf_counter()
+            for _ in pepstats_tables.write_columnar_records(iter(records), output_file, output_format, args.batch):
+                pass
+            elapsed = time.perf_counter() - time_start
+
+            if output_format == "parquet":
+                table = pq.read_table(output_file)
+            else:
+                with pa.ipc.open_file(output_file) as reader:
+                    table = reader.read_all()
+            assert table.num_rows == len(records)
+            assert table.column("Protein_ID").to_pylist() == [record[0] for record in records]
+            assert table.column("Molecular_weight").to_pylist() == [float(record[1]) for record in records]
+            print(f"{output_format.capitalize() + ':':<23}{elapsed:.2f} s, {os.path.getsize(output_file) / 1048576:.1f} MB, read back OK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# Protein_ID lookups in the binary index (PepStatsIndex) against a linear scan of Table_01, on a synthetic table
+#
+# USAGE: python3 benchmarks/bench_index_lookup.py [-n 1000000] [-l 1000] [-b 10000]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import pepstats_tables
+from bench_table02_memory import synthetic_records
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary index lookup benchmark")
+    parser.add_argument('-n', '--proteins', type=int, default=1000000, help='Number of synthetic proteins (default 1000000)')
+    parser.add_argument('-l', '--lookups', type=int, default=1000, help='Number of single lookups (default 1000)')
+    parser.add_argument('-b', '--batch', type=int, default=10000, help='Number of Protein_IDs per batch lookup (default 10000)')
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        table_01_file = os.path.join(tmp_dir, "Table_01")
+        index_file = os.path.join(tmp_dir, "Index")
+
+        # Shuffled rows, so that the index has to sort them
+        records = list(synthetic_records(args.proteins))
+        rng.shuffle(records)
+        with open(table_01_file, 'w') as output_file:
+            output_file.write('\t'.join(pepstats_tables.pepstats_table_columns) + '\n')
+            for record in records:
+                output_file.write('\t'.join(record) + '\n')
+        protein_ids = [record[0] for record in records]
+        del records
+
+        time_start = time.perf_counter()
+        pepstats_tables.write_pepstats_index(table_01_file, index_file)
+        print(f"Index written:         {time.perf_counter() - time_start:.2f} s, {os.path.getsize(index_file) / 1048576:.1f} MB for {args.proteins} proteins")
+
+        time_start = time.perf_counter()
+        index = pepstats_tables.PepStatsIndex(index_file)
+        print(f"Index opened:          {(time.perf_counter() - time_start) * 1000:.3f} ms")
+
+        # A linear scan of Table_01 for a single Protein_ID, as done without the index
+        wanted = rng.choice(protein_ids)
+        time_start = time.perf_counter()
+        with open(table_01_file, 'r') as input_file:
+            for line in input_file:
+                if line.startswith(wanted + '\t'):
+                    break
+        print(f"Table_01 scan:         {(time.perf_counter() - time_start) * 1000:.3f} ms per lookup")
+
+        lookups = rng.sample(protein_ids, min(args.lookups, len(protein_ids)))
+        time_start = time.perf_counter()
+        for protein_id in lookups:
+            index[protein_id]
+        print(f"Index single lookups:  {(time.perf_counter() - time_start) * 1e6 / len(lookups):.1f} us per lookup")
+
+        batch = rng.sample(protein_ids, min(args.batch, len(protein_ids))) + ["MISSING"]
+        time_start = time.perf_counter()
+        found, values = index.lookup_many(batch)
+        print(f"Index batch lookup:    {(time.perf_counter() - time_start) * 1000:.3f} ms for {len(batch)} Protein_IDs ({found.sum()} found)")
+        assert found.sum() == len(batch) - 1 and not found[-1]
+        index.close()
+
+        # An empty table gives an empty index
+        with open(table_01_file, 'w') as output_file:
+            output_file.write('\t'.join(pepstats_tables.pepstats_table_columns) + '\n')
+        pepstats_tables.write_pepstats_index(table_01_file, index_file)
+        with pepstats_tables.PepStatsIndex(index_file) as empty_index:
+            assert len(empty_index) == 0 and empty_index.get("MISSING") is None
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# Lines per second of the single-alternation report classifier against the v1.0.0 list of 33 regex patterns, for the
+# default columns and for a selection of three columns (only the lines of the selected columns are split).
+# Without -i, the report is made by pepstats from a synthetic proteome (-n proteins); unless --emboss is given,
+# pepstats is the stub in benchmarks/stub.
+#
+# USAGE: python3 benchmarks/bench_line_classifier.py [-i Homo_sapiens.GRCh38.pep.all.fa_PepStats_Tables.00_Main_PepStats_Analysis] [-n 10000] [-r 3]
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(benchmarks_dir, os.pardir))
+sys.path.insert(0, benchmarks_dir)
+import pepstats_tables
+from generate_proteome import generate_proteome
+
+# Regex patterns of v1.0.0, searched one after the other on every report line
+patterns_v1 = [
+    (re.compile(r"PEPSTATS"), 3),
+    (re.compile(r"Molecular weight"), 4),
+    (re.compile(r"Isoelectric Point ="), -1),
+    (re.compile(r"A = Ala"), 5),
+    (re.compile(r"C = Cys"), 4),
+    (re.compile(r"D = Asp"), 4),
+    (re.compile(r"E = Glu"), 4),
+    (re.compile(r"F = Phe"), 4),
+    (re.compile(r"G = Gly"), 4),
+    (re.compile(r"H = His"), 4),
+    (re.compile(r"A = Ala"), 4),
+    (re.compile(r"I = Ile"), 4),
+    (re.compile(r"K = Lys"), 4),
+    (re.compile(r"L = Leu"), 4),
+    (re.compile(r"M = Met"), 4),
+    (re.compile(r"N = Asn"), 4),
+    (re.compile(r"P = Pro"), 4),
+    (re.compile(r"Q = Gln"), 4),
+    (re.compile(r"R = Arg"), 4),
+    (re.compile(r"S = Ser"), 4),
+    (re.compile(r"T = Thr"), 4),
+    (re.compile(r"V = Val"), 4),
+    (re.compile(r"W = Trp"), 4),
+    (re.compile(r"Y = Tyr"), 4),
+    (re.compile(r"Tiny"), -1),
+    (re.compile(r"Small"), -1),
+    (re.compile(r"Aliphatic"), -1),
+    (re.compile(r"Aromatic"), -1),
+    (re.compile(r"Non-polar"), -1),
+    (re.compile(r"Polar"), -1),
+    (re.compile(r"Charged"), -1),
+    (re.compile(r"Basic"), -1),
+    (re.compile(r"Acidic"), -1),
+]
+
+def extract_v1(lines):
+    values = []
+    for line in lines:
+        for pattern, field_index in patterns_v1:
+            if pattern.search(line):
+                words = line.split()
+                if field_index == -1:
+                    field_index = len(words)
+                values.append(words[field_index - 1])
+                break
+    return values
+
+def extract_classifier(lines):
+    return [value for record in pepstats_tables.parse_pepstats_report(lines) for value in record]
+
+selected_columns = ["Protein_ID", "Molecular_weight", "Isoelectric_Point"]
+
+def extract_selected(lines):
+    return [value for record in pepstats_tables.parse_pepstats_report(lines, selected_columns) for value in record]
+
+# Best wall time of several repeats, in seconds
+def best_time(function, lines, repeats):
+    timings = []
+    for _ in range(repeats):
+        time_start = time.perf_counter()
+        values = function(lines)
+        timings.append(time.perf_counter() - time_start)
+    return min(timings), values
+
+def main():
+    parser = argparse.ArgumentParser(description="pepstats report line classifier benchmark")
+    parser.add_argument('-i', '--input', help='pepstats report (e.g. a .00_Main_PepStats_Analysis file); generated when omitted')
+    parser.add_argument('-n', '--proteins', type=int, default=10000, help='Proteins of the synthetic proteome used without -i (default 10000)')
+    parser.add_argument('-r', '--repeats', type=int, default=3, help='Number of repeats, the best is reported (default 3)')
+    parser.add_argument('--emboss', action='store_true', help='Use the EMBOSS pepstats found in PATH instead of the stub')
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'r') as input_file:
+            lines = input_file.readlines()
+    else:
+        if not args.emboss:
+            os.environ["PATH"] = os.path.join(benchmarks_dir, "stub") + os.pathsep + os.environ["PATH"]
+        with tempfile.TemporaryDirectory() as work_dir:
+            generate_proteome(os.path.join(work_dir, "proteome.fa"), args.proteins)
+            pepstats_tables.run_pepstats(os.path.join(work_dir, "proteome.fa"), os.path.join(work_dir, "proteome.pepstats"))
+            with open(os.path.join(work_dir, "proteome.pepstats"), 'r') as input_file:
+                lines = input_file.readlines()
+
+    time_v1, values_v1 = best_time(extract_v1, lines, args.repeats)
+    time_classifier, values_classifier = best_time(extract_classifier, lines, args.repeats)
+    time_selected, _ = best_time(extract_selected, lines, args.repeats)
+
+    if values_v1 != values_classifier:
+        sys.exit("The classifier and the v1.0.0 patterns extracted different values.")
+
+    print(f"Report:                    {args.input or f'{args.proteins} synthetic proteins, ' + ('EMBOSS pepstats' if args.emboss else 'stub pepstats')}")
+    print(f"Report Lines:              {len(lines)}")
+    print(f"Values Extracted:          {len(values_v1)}")
+    print(f"v1.0.0 Patterns:           {len(lines) / time_v1:,.0f} lines/second")
+    print(f"Alternation Classifier:    {len(lines) / time_classifier:,.0f} lines/second")
+    print(f"Speedup:                   {time_v1 / time_classifier:.2f}x")
+    print(f"Classifier, 3 Columns:     {len(lines) / time_selected:,.0f} lines/second")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# Fixed per-invocation cost of PepStats_Tables_v1.0.0.py on a one-protein proteome: the wall time of each run minus
+# the wall time of its stages (from -M), i.e. interpreter startup, imports, argument parsing, dependency probing,
+# logging and directory handling. The bare interpreter startup is reported for reference. Bytecode caching is
+# enabled (as in a normal installation) and a first run is not timed, so the library is not compiled while timed.
+# Unless --emboss is given, pepstats is the stub in benchmarks/stub.
+#
+# USAGE: python3 benchmarks/bench_startup.py [-n 20] [-e emboss,native] [-l 100]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+script_file = os.path.join(benchmarks_dir, os.pardir, "PepStats_Tables_v1.0.0.py")
+
+# Wall time of a command in seconds
+def timed_run(command, cwd, env):
+    time_start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - time_start
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup cost benchmark")
+    parser.add_argument('-n', '--runs', type=int, default=20, help='Number of runs per engine, the median is reported (default 20)')
+    parser.add_argument('-e', '--engines', default='emboss,native', help='Comma separated engines (default emboss,native)')
+    parser.add_argument('-l', '--limit', type=float, default=100.0, help='Fixed cost limit in ms (default 100)')
+    parser.add_argument('--emboss', action='store_true', help='Use the EMBOSS pepstats found in PATH instead of the stub')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    if not args.emboss:
+        env["PATH"] = os.path.join(benchmarks_dir, "stub") + os.pathsep + env["PATH"]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        with open(os.path.join(work_dir, "tiny.fa"), 'w') as output_file:
+            output_file.write(">P1\nMKTAYIAKQRQISFVKSHFSRQ\n")
+
+        interpreter = statistics.median(timed_run([sys.executable, "-c", "pass"], work_dir, env) for _ in range(args.runs))
+        print(f"Bare Interpreter:          {interpreter * 1000:.1f} ms")
+
+        exceeded = False
+        for engine in args.engines.split(','):
+            timed_run([sys.executable, script_file, "-p", "tiny.fa", "-z", "1", "-e", engine], work_dir, env)
+            fixed_costs = []
+            for _ in range(args.runs):
+                metrics_file = os.path.join(work_dir, "metrics.json")
+                wall = timed_run([sys.executable, script_file, "-p", "tiny.fa", "-z", "1", "-e", engine, "-M", metrics_file], work_dir, env)
+                with open(metrics_file, 'r') as input_file:
+                    stages = json.load(input_file)["stages"]
+                fixed_costs.append(wall - sum(stage["wall_seconds"] for stage in stages))
+            fixed_cost = statistics.median(fixed_costs) * 1000
+            exceeded = exceeded or fixed_cost >= args.limit
+            print(f"Fixed Cost ({engine}):{' ' * (13 - len(engine))}{fixed_cost:.1f} ms (min {min(fixed_costs) * 1000:.1f} ms, limit {args.limit:.0f} ms)")
+
+    if exceeded:
+        sys.exit("The fixed cost exceeds the limit.")
+
+if __name__ == "__main__":
+    main()
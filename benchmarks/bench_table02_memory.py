@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# Peak RSS of the Table_01/Table_02 writer on a synthetic proteome, compared against the configured memory ceiling.
+# The Table_02 rows must be larger than the Table_02 copy buffer, so that assembling them is actually bounded by it.
+#
+# USAGE: python3 benchmarks/bench_table02_memory.py [-n 1000000] [-m 64]
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import pepstats_tables
+
+# Yield synthetic Table_01 records with realistic value widths, without keeping them in memory
+def synthetic_records(number_of_proteins, seed=1):
+    rng = random.Random(seed)
+    for index in range(number_of_proteins):
+        record = [f"SYNTH{index:09d}", f"{rng.uniform(1000, 400000):.2f}", f"{rng.uniform(3, 12):.4f}", f"{rng.uniform(0, 20):.3f}"]
+        record.extend(str(rng.randint(0, 300)) for _ in range(19))
+        record.extend(f"{rng.uniform(0, 100):.3f}" for _ in range(9))
+        yield record
+
+# Peak resident set size of this process in MB (ru_maxrss is in KB on Linux and in bytes on macOS)
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Table_02 transpose memory benchmark")
+    parser.add_argument('-n', '--proteins', type=int, default=1000000, help='Number of synthetic proteins (default 1000000)')
+    parser.add_argument('-m', '--max_memory', type=int, default=64, help='Memory ceiling in MB (default 64)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        time_start = time.perf_counter()
+        number_of_records = pepstats_tables.write_pepstats_tables(
+            synthetic_records(args.proteins),
+            os.path.join(tmp_dir, "Table_01"),
+            os.path.join(tmp_dir, "Table_02"),
+            os.path.join(tmp_dir, "column"),
+            args.max_memory,
+        )
+        elapsed = time.perf_counter() - time_start
+        # The peak is read before Table_02 is scanned, since its rows are read whole
+        peak = peak_rss_mb()
+        table_02_size = os.path.getsize(os.path.join(tmp_dir, "Table_02")) / (1024 * 1024)
+        with open(os.path.join(tmp_dir, "Table_02"), 'rb') as input_file:
+            largest_row = max(len(line) for line in input_file) / (1024 * 1024)
+
+    copy_buffer = pepstats_tables.table_02_copy_buffer_size / (1024 * 1024)
+    passed = peak < args.max_memory and largest_row > copy_buffer
+    print(f"Proteins:          {number_of_records}")
+    print(f"Table_02 Size:     {table_02_size:.1f} MB")
+    print(f"Largest Row:       {largest_row:.1f} MB (copy buffer {copy_buffer:.1f} MB)")
+    print(f"Elapsed:           {elapsed:.1f} seconds")
+    print(f"Peak RSS:          {peak:.1f} MB")
+    print(f"Memory Ceiling:    {args.max_memory} MB")
+    if largest_row <= copy_buffer:
+        print("The Table_02 rows fit in the copy buffer: use more proteins (-n)")
+    print("RESULT:            " + ("PASS" if passed else "FAIL"))
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
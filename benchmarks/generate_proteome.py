@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# Synthetic FASTA proteome generator for the benchmarks
+#
+# Protein lengths follow a log-normal distribution (median 350 residues by default) with a small fraction of
+# titin-like outliers (20,000 to 35,000 residues); residues follow the UniProtKB amino acid composition.
+#
+# USAGE: python3 benchmarks/generate_proteome.py -n 100000 -o Synthetic_100k.fa [--median 350] [--sigma 0.7] [--outliers 0.0005]
+import argparse
+import math
+import random
+
+# UniProtKB/Swiss-Prot amino acid composition (%)
+residue_frequencies = {
+    "A": 8.25, "R": 5.53, "N": 4.06, "D": 5.45, "C": 1.37, "Q": 3.93, "E": 6.75, "G": 7.07, "H": 2.27, "I": 5.96,
+    "L": 9.66, "K": 5.84, "M": 2.42, "F": 3.86, "P": 4.70, "S": 6.56, "T": 5.34, "W": 1.08, "Y": 2.92, "V": 6.87,
+}
+
+# Write number_of_proteins synthetic proteins to output_file and return the total number of residues
+def generate_proteome(output_file, number_of_proteins, median_length=350, sigma=0.7, outlier_fraction=0.0005, seed=1):
+    rng = random.Random(seed)
+    residues = list(residue_frequencies)
+    weights = list(residue_frequencies.values())
+    total_residues = 0
+
+    with open(output_file, 'w') as output_handle:
+        for index in range(number_of_proteins):
+            if rng.random() < outlier_fraction:
+                length = rng.randint(20000, 35000)
+            else:
+                length = max(20, int(rng.lognormvariate(math.log(median_length), sigma)))
+            sequence = "M" + "".join(rng.choices(residues, weights, k=length - 1))
+            output_handle.write(f">SYNTH{index:09d} synthetic protein length={length}\n")
+            for start in range(0, length, 60):
+                output_handle.write(sequence[start:start + 60] + "\n")
+            total_residues += length
+
+    return total_residues
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic FASTA proteome generator")
+    parser.add_argument('-n', '--proteins', type=int, required=True, help='Number of proteins')
+    parser.add_argument('-o', '--output', required=True, help='Output FASTA file')
+    parser.add_argument('--median', type=int, default=350, help='Median protein length (default 350)')
+    parser.add_argument('--sigma', type=float, default=0.7, help='Sigma of the log-normal length distribution (default 0.7)')
+    parser.add_argument('--outliers', type=float, default=0.0005, help='Fraction of titin-like outliers (default 0.0005)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default 1)')
+    args = parser.parse_args()
+
+    total_residues = generate_proteome(args.output, args.proteins, args.median, args.sigma, args.outliers, args.seed)
+    print(f"{args.output}: {args.proteins} proteins, {total_residues} residues")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# Benchmark suite: times every stage of the pipeline on synthetic proteomes and writes machine-readable JSON
+#
+# Stages: pepstats (report generation), extraction (report -> records), table_01 (Table_01 rows and Table_02 spill
+# files), table_02 (Table_02 assembly), moves (results into the output directory) and native (native engine).
+# Each stage runs in its own process, so its peak RSS is not inflated by the stages before it. Unless --emboss is
+# given, pepstats is the stub in benchmarks/stub, so the suite runs on machines without EMBOSS.
+#
+# USAGE: python3 benchmarks/run_benchmarks.py [-s 1000,100000,1000000] [-j results.json] [--compare baseline.json]
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(benchmarks_dir, os.pardir))
+sys.path.insert(0, benchmarks_dir)
+import pepstats_tables
+from generate_proteome import generate_proteome
+
+stage_names = ["pepstats", "extraction", "table_01", "table_02", "moves", "native"]
+
+# Peak resident set size in MB of this process or of its largest child (ru_maxrss is in bytes on macOS)
+def peak_rss_mb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def read_rows(rows_file):
+    with open(rows_file, 'r') as input_file:
+        for line in input_file:
+            yield line.rstrip('\n').split('\t')
+
+def write_rows(records, rows_file):
+    number_of_records = 0
+    with open(rows_file, 'w') as output_file:
+        for record in records:
+            output_file.write('\t'.join(record) + '\n')
+            number_of_records += 1
+    return number_of_records
+
+# Run one stage and return (output files, number of records)
+def execute_stage(stage, work_dir, max_memory):
+    fasta_file = os.path.join(work_dir, "proteome.fa")
+    report_file = os.path.join(work_dir, "001.out")
+    rows_file = os.path.join(work_dir, "002.out")
+    table_01_file = os.path.join(work_dir, "Table_01")
+    table_02_file = os.path.join(work_dir, "Table_02")
+    spill_prefix = os.path.join(work_dir, "003.column")
+    results_dir = os.path.join(work_dir, "results")
+
+    if stage == "pepstats":
+        pepstats_tables.run_pepstats(fasta_file, report_file)
+        return [report_file], None
+    if stage == "extraction":
+        return [rows_file], write_rows(pepstats_tables.read_pepstats_report(report_file), rows_file)
+    if stage == "table_01":
+        number_of_records = pepstats_tables.write_table_01_and_spills(read_rows(rows_file), table_01_file, spill_prefix, max_memory)
+        return [table_01_file] + pepstats_tables.table_02_spill_files(spill_prefix), number_of_records
+    if stage == "table_02":
+        pepstats_tables.assemble_table_02(table_02_file, spill_prefix, max_memory)
+        return [table_02_file], None
+    if stage == "moves":
+        os.makedirs(results_dir, exist_ok=True)
+        for output_file in (report_file, table_01_file, table_02_file):
+            shutil.move(output_file, results_dir)
+        return [], None
+    if stage == "native":
+        return [os.path.join(work_dir, "002.native.out")], write_rows(pepstats_tables.compute_native_pepstats(fasta_file), os.path.join(work_dir, "002.native.out"))
+    raise ValueError(stage)
+
+# Child process entry point: run one stage and report its metrics through the queue
+def stage_process(stage, work_dir, max_memory, stub_path, queue):
+    if stub_path:
+        os.environ["PATH"] = stub_path + os.pathsep + os.environ["PATH"]
+    os.environ["LC_ALL"] = "C"
+    wall_start = time.perf_counter()
+    cpu_start = os.times()
+    output_files, number_of_records = execute_stage(stage, work_dir, max_memory)
+    cpu_stop = os.times()
+    wall_seconds = time.perf_counter() - wall_start
+    cpu_seconds = sum(cpu_stop[:4]) - sum(cpu_start[:4])
+    queue.put({
+        "stage": stage,
+        "wall_seconds": round(wall_seconds, 4),
+        "cpu_seconds": round(cpu_seconds, 4),
+        "peak_rss_mb": round(max(peak_rss_mb(resource.RUSAGE_SELF), peak_rss_mb(resource.RUSAGE_CHILDREN)), 1),
+        "bytes_written": sum(os.path.getsize(output_file) for output_file in output_files if os.path.isfile(output_file)),
+        "records": number_of_records,
+        "records_per_second": round(number_of_records / wall_seconds, 1) if number_of_records else None,
+    })
+
+def run_stage(context, stage, work_dir, max_memory, stub_path):
+    queue = context.Queue()
+    process = context.Process(target=stage_process, args=(stage, work_dir, max_memory, stub_path, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def benchmark_size(context, number_of_proteins, stages, max_memory, stub_path, keep):
+    work_dir = tempfile.mkdtemp(prefix=f"PepStats_Tables_Benchmark_{number_of_proteins}_")
+    try:
+        time_start = time.perf_counter()
+        total_residues = generate_proteome(os.path.join(work_dir, "proteome.fa"), number_of_proteins)
+        generation_seconds = time.perf_counter() - time_start
+        results = []
+        for stage in stages:
+            result = run_stage(context, stage, work_dir, max_memory, stub_path)
+            print(f"  {number_of_proteins:>9} proteins  {stage:<10}  {result['wall_seconds']:>9.2f} s  {result['peak_rss_mb']:>8.1f} MB  {result['bytes_written']:>13} bytes")
+            results.append(result)
+        return {
+            "proteins": number_of_proteins,
+            "residues": total_residues,
+            "fasta_bytes": os.path.getsize(os.path.join(work_dir, "proteome.fa")),
+            "generation_seconds": round(generation_seconds, 2),
+            "stages": results,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir)
+
+# Print the wall time and peak RSS ratios of each stage against a previous results file
+def compare_results(current, baseline):
+    baseline_stages = {(size["proteins"], stage["stage"]): stage for size in baseline["results"] for stage in size["stages"]}
+    print(f"\nComparison with version {baseline['version']} (ratio current / baseline):")
+    for size in current["results"]:
+        for stage in size["stages"]:
+            previous = baseline_stages.get((size["proteins"], stage["stage"]))
+            if previous is None or not previous["wall_seconds"]:
+                continue
+            print(f"  {size['proteins']:>9} proteins  {stage['stage']:<10}  wall {stage['wall_seconds'] / previous['wall_seconds']:>6.2f}x  peak RSS {stage['peak_rss_mb'] / previous['peak_rss_mb']:>6.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="PepStats_Tables benchmark suite")
+    parser.add_argument('-s', '--sizes', default="1000,100000,1000000", help='Comma separated proteome sizes (default 1000,100000,1000000)')
+    parser.add_argument('--stages', default=",".join(stage_names), help=f'Comma separated stages (default {",".join(stage_names)})')
+    parser.add_argument('-m', '--max_memory', type=int, default=256, help='Memory ceiling in MB for the Table_02 buffers (default 256)')
+    parser.add_argument('-j', '--json', default=None, help='Write the results to this JSON file')
+    parser.add_argument('--compare', default=None, help='Compare the results against a previous JSON results file')
+    parser.add_argument('--emboss', action='store_true', help='Use the EMBOSS pepstats found in PATH instead of the stub')
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark working directories')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    stages = args.stages.split(",")
+    stub_path = None if args.emboss else os.path.join(benchmarks_dir, "stub")
+    context = multiprocessing.get_context("spawn")
+
+    current = {
+        "version": pepstats_tables.__version__,
+        "python": platform.python_version(),
+        "platform": f"{platform.system()} {platform.machine()}",
+        "pepstats": "emboss" if args.emboss else "stub",
+        "max_memory_mb": args.max_memory,
+        "results": [benchmark_size(context, size, stages, args.max_memory, stub_path, args.keep) for size in sizes],
+    }
+
+    if args.json:
+        with open(args.json, 'w') as output_file:
+            json.dump(current, output_file, indent=2)
+            output_file.write('\n')
+
+    if args.compare:
+        with open(args.compare, 'r') as input_file:
+            compare_results(current, json.load(input_file))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2052 @@
+#!/usr/bin/env python3
+# PepStats_Tables library: pepstats report extraction, native engine, table writers and result cache
+#
+# The command line script (PepStats_Tables_v1.0.0.py) is a thin wrapper over run_pepstats_tables(), and
+# long-lived Python processes can call compute_pepstats() directly:
+#
+#     import pepstats_tables
+#     table = pepstats_tables.compute_pepstats([("P1", "MKTAYIAKQR"), ("P2", "MSSHEGGKKK")])
+#     table = pepstats_tables.compute_pepstats("Homo_sapiens.GRCh38.pep.all.fa", engine="emboss", threads=8)
+# Modules used by some features only (compression, thread pools, result cache, index, ...) are imported where they
+# are used, so that the many small runs do not pay for them at startup
+import os
+import sys
+import shutil
+import subprocess
+import re
+import io
+import contextlib
+import itertools
+import functools
+import time
+import threading
+from collections import deque
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Defining Library Current Version
+__version__ = "1.0.0"
+
+# Path of a command found in PATH, or None; every command is probed once per process
+@functools.lru_cache(maxsize=None)
+def find_executable(command):
+    return shutil.which(command)
+
+# Compressed files are recognized from their first bytes (bgzip files are gzip files made of several members)
+sequence_file_magic = {b'\x1f\x8b': "gzip", b'\x28\xb5\x2f\xfd': "zstd"}
+compressed_file_extensions = {"gzip": ".gz", "zstd": ".zst"}
+
+# Raw stream of the first bytes already read from a pipe followed by the rest of the pipe, so that they can be read again
+class PipeWithHead(io.RawIOBase):
+    def __init__(self, head, pipe):
+        self.head = head
+        self.pipe = pipe
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.head:
+            size = min(len(buffer), len(self.head))
+            buffer[:size] = self.head[:size]
+            self.head = self.head[size:]
+            return size
+        return self.pipe.readinto(buffer)
+
+# Binary file whose first 4 bytes can be peeked: on a pipe, peek returns what one raw read gives (possibly fewer bytes
+# than a magic number), so the head is read until 4 bytes or the end of the pipe and put back in front of the rest
+def peekable_sequence_file(binary_file):
+    if len(binary_file.peek(4)) >= 4 or binary_file.seekable():
+        return binary_file
+    return io.BufferedReader(PipeWithHead(binary_file.read(4), binary_file), 1024 * 1024)
+
+# Compression of an open binary file ("gzip", "zstd" or None), read without consuming its first bytes (pipes must go
+# through peekable_sequence_file first)
+def sequence_file_compression(binary_file):
+    head = binary_file.peek(4)[:4]
+    for magic, compression in sequence_file_magic.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+# True when a sequence file is read through decompression or from standard input ("-") rather than as a plain file
+def is_streamed_input(sequence_file):
+    if sequence_file == "-":
+        return True
+    with open(sequence_file, 'rb') as binary_file:
+        return sequence_file_compression(binary_file) is not None
+
+# Proteome name of a sequence file: its file name without compression and FASTA extensions ("stdin" for "-")
+def proteome_name(sequence_file):
+    if sequence_file == "-":
+        return "stdin"
+    name = os.path.basename(sequence_file)
+    for extension in (".gz", ".bgz", ".zst", ".zstd"):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+            break
+    return os.path.splitext(name)[0]
+
+# Copy a binary stream into a pipe (used to feed the zstd command line tool), closing the pipe at the end
+def feed_pipe(input_file, pipe):
+    try:
+        shutil.copyfileobj(input_file, pipe, 1024 * 1024)
+    except BrokenPipeError:
+        pass
+    finally:
+        try:
+            pipe.close()
+        except BrokenPipeError:
+            pass
+
+# Open a sequence file for binary reading, decompressing gzip, bgzip and zstd files on the fly; "-" is standard input.
+# zstd uses the zstandard module when installed and the zstd command line tool otherwise.
+@contextlib.contextmanager
+def open_sequence_input(sequence_file):
+    binary_file = peekable_sequence_file(sys.stdin.buffer) if sequence_file == "-" else open(sequence_file, 'rb')
+    try:
+        compression = sequence_file_compression(binary_file)
+        if compression == "gzip":
+            import gzip
+            with gzip.GzipFile(fileobj=binary_file, mode='rb') as input_file:
+                yield input_file
+        elif compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                zstandard = None
+            if zstandard is not None:
+                with zstandard.ZstdDecompressor().stream_reader(binary_file, read_across_frames=True, closefd=False) as input_file:
+                    yield io.BufferedReader(input_file, 1024 * 1024)
+            else:
+                if find_executable("zstd") is None:
+                    raise ImportError("Reading zstd files requires the zstandard module (pip install zstandard) or the zstd command.")
+                process = subprocess.Popen(["zstd", "-d", "-c", "-q"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                feeder = threading.Thread(target=feed_pipe, args=(binary_file, process.stdin), daemon=True)
+                feeder.start()
+                try:
+                    yield process.stdout
+                finally:
+                    process.stdout.close()
+                    process.wait()
+                    feeder.join()
+        else:
+            yield binary_file
+    finally:
+        if sequence_file != "-":
+            binary_file.close()
+
+# Open an output file for binary writing, compressed with gzip or zstd (compression None writes it as is)
+@contextlib.contextmanager
+def open_compressed_output(output_file, compression=None):
+    with open(output_file, 'wb') as binary_file:
+        if compression is None:
+            yield binary_file
+        elif compression == "gzip":
+            import gzip
+            with gzip.GzipFile(fileobj=binary_file, mode='wb', compresslevel=6) as compressed_file:
+                yield compressed_file
+        elif compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                zstandard = None
+            if zstandard is not None:
+                with zstandard.ZstdCompressor(level=3).stream_writer(binary_file, closefd=False) as compressed_file:
+                    yield compressed_file
+            else:
+                if find_executable("zstd") is None:
+                    raise ImportError("Writing zstd files requires the zstandard module (pip install zstandard) or the zstd command.")
+                process = subprocess.Popen(["zstd", "-c", "-q"], stdin=subprocess.PIPE, stdout=binary_file)
+                try:
+                    yield process.stdin
+                finally:
+                    process.stdin.close()
+                    process.wait()
+        else:
+            raise ValueError(f"Unknown compression: {compression} (expected gzip or zstd)")
+
+# Name of an output file once compressed
+def compressed_file_name(output_file, compression=None):
+    return output_file + compressed_file_extensions[compression] if compression is not None else output_file
+
+# Move a finished output file to its destination, compressing it on the way (the destination gets the .gz or .zst
+# extension) when compression is set
+def move_output(source_file, destination_file, compression=None):
+    if compression is None:
+        shutil.move(source_file, destination_file)
+        return destination_file
+    destination_file = compressed_file_name(destination_file, compression)
+    with open(source_file, 'rb') as input_file, open_compressed_output(destination_file, compression) as output_file:
+        shutil.copyfileobj(input_file, output_file, 1024 * 1024)
+    os.remove(source_file)
+    return destination_file
+
+# Split a FASTA file into record-aligned shards of roughly equal size
+def split_fasta_into_shards(fasta_file, shard_prefix, number_of_shards):
+    target_shard_size = os.path.getsize(fasta_file) / number_of_shards
+    shard_files = []
+    shard_size = 0
+    output_file = None
+
+    with open(fasta_file, 'r') as input_file:
+        for line in input_file:
+            # Start a new shard only at a record boundary, once the current shard is full
+            if line.startswith('>') and (output_file is None or (shard_size >= target_shard_size and len(shard_files) < number_of_shards)):
+                if output_file is not None:
+                    output_file.close()
+                shard_files.append(f"{shard_prefix}_{len(shard_files):04d}.fa")
+                output_file = open(shard_files[-1], 'w')
+                shard_size = 0
+            if output_file is not None:
+                output_file.write(line)
+                shard_size += len(line)
+
+    if output_file is not None:
+        output_file.close()
+
+    return shard_files
+
+# Run pepstats on a single sequence file, suppressing stderr, and return its exit status. Compressed files and
+# standard input ("-") are decompressed straight into the pepstats standard input.
+def run_pepstats(sequence_file, output_file):
+    if is_streamed_input(sequence_file):
+        with open_sequence_input(sequence_file) as input_file:
+            return run_pepstats_piped(input_file, output_file)
+    pepstats_command = [
+        "pepstats",
+        "-sequence", sequence_file,
+        "-outfile", output_file
+    ]
+    with open(os.devnull, 'w') as devnull:
+        return subprocess.run(pepstats_command, stderr=devnull).returncode
+
+# Run pepstats on FASTA data (bytes or an open binary file) passed through its standard input, suppressing stderr,
+# and return its exit status
+def run_pepstats_piped(sequence_data, output_file):
+    pepstats_command = [
+        "pepstats",
+        "-sequence", "fasta::stdin",
+        "-outfile", output_file
+    ]
+    with open(os.devnull, 'w') as devnull:
+        process = subprocess.Popen(pepstats_command, stdin=subprocess.PIPE, stderr=devnull)
+        if isinstance(sequence_data, bytes):
+            sequence_data = io.BytesIO(sequence_data)
+        feed_pipe(sequence_data, process.stdin)
+        return process.wait()
+
+# Run pepstats over record-aligned shards in parallel and merge the reports in the original order. With a
+# quarantine function, failed shards are retried in isolation (see run_pepstats_checked); returns the number of
+# shards retried.
+def run_pepstats_sharded(sequence_file, output_file, shard_prefix, threads, quarantine=None):
+    from concurrent.futures import ThreadPoolExecutor
+    if is_streamed_input(sequence_file):
+        run_pepstats_streamed_shards(sequence_file, output_file, shard_prefix, threads)
+        return 0
+    shard_files = split_fasta_into_shards(sequence_file, shard_prefix, threads)
+    shard_output_files = [f"{shard_file}.out" for shard_file in shard_files]
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        if quarantine is None:
+            list(executor.map(run_pepstats, shard_files, shard_output_files))
+            retried_shards = 0
+        else:
+            retried_shards = sum(executor.map(functools.partial(run_pepstats_checked, quarantine=quarantine), shard_files, shard_output_files))
+
+    with open(output_file, 'w') as merged_file:
+        for shard_file, shard_output_file in zip(shard_files, shard_output_files):
+            with open(shard_output_file, 'r') as shard_output:
+                shutil.copyfileobj(shard_output, merged_file)
+            os.remove(shard_file)
+            os.remove(shard_output_file)
+
+    return retried_shards
+
+# Sharded run of a compressed or standard input sequence file, whose size is unknown until it is read: shards of
+# about shard_size bytes of FASTA are cut while decompressing and piped to pepstats, so no shard is written to disk
+def run_pepstats_streamed_shards(sequence_file, output_file, shard_prefix, threads, shard_size=8 * 1024 * 1024):
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    def shards():
+        shard = []
+        size = 0
+        for protein_id, sequence in read_fasta_records(sequence_file):
+            shard.append((protein_id, sequence))
+            size += len(protein_id) + len(sequence) + 3
+            if size >= shard_size:
+                yield chunk_fasta_bytes(shard)
+                shard = []
+                size = 0
+        if shard:
+            yield chunk_fasta_bytes(shard)
+
+    shard_output_files = []
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = set()
+        for index, shard in enumerate(shards()):
+            shard_output_files.append(f"{shard_prefix}_{index:04d}.fa.out")
+            pending.add(executor.submit(run_pepstats_piped, shard, shard_output_files[-1]))
+            # Keep at most two shards per thread in memory
+            if len(pending) >= 2 * threads:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+        for future in pending:
+            future.result()
+
+    with open(output_file, 'w') as merged_file:
+        for shard_output_file in shard_output_files:
+            with open(shard_output_file, 'r') as shard_output:
+                shutil.copyfileobj(shard_output, merged_file)
+            os.remove(shard_output_file)
+
+# Residues of the pepstats residue table: one-letter code, the three-letter name printed by pepstats ("---" for J, O
+# and U) and the name used in column names
+pepstats_residues = [
+    ("A", "Ala", "Ala"), ("B", "Asx", "Asx"), ("C", "Cys", "Cys"), ("D", "Asp", "Asp"), ("E", "Glu", "Glu"),
+    ("F", "Phe", "Phe"), ("G", "Gly", "Gly"), ("H", "His", "His"), ("I", "Ile", "Ile"), ("J", "---", "Xle"),
+    ("K", "Lys", "Lys"), ("L", "Leu", "Leu"), ("M", "Met", "Met"), ("N", "Asn", "Asn"), ("O", "---", "Pyl"),
+    ("P", "Pro", "Pro"), ("Q", "Gln", "Gln"), ("R", "Arg", "Arg"), ("S", "Ser", "Ser"), ("T", "Thr", "Thr"),
+    ("U", "---", "Sec"), ("V", "Val", "Val"), ("W", "Trp", "Trp"), ("X", "Xaa", "Xaa"), ("Y", "Tyr", "Tyr"),
+    ("Z", "Glx", "Glx"),
+]
+pepstats_properties = ["Tiny", "Small", "Aliphatic", "Aromatic", "Non-polar", "Polar", "Charged", "Basic", "Acidic"]
+
+# Registry of the values extracted from a pepstats report: column name, label starting the report line holding the
+# value, and word of that line holding it (-1 is the last word). Adding a property is one entry here.
+# The v1.0.0 Table_01 columns come first and keep their v1.0.0 word positions: Mole%_Ala is read from the Mole%
+# column of the residue table, while the other Mole%_<residue> columns are read from its Number column.
+pepstats_fields = [
+    ("Protein_ID", "PEPSTATS", 3),
+    ("Molecular_weight", "Molecular weight", 4),
+    ("Isoelectric_Point", "Isoelectric Point =", -1),
+    ("Mole%_Ala", "A = Ala", 5),
+] + [
+    (f"Mole%_{name3}", f"{code} = {name3}", 4) for code, name3, _ in pepstats_residues if code in "CDEFGHIKLMNPQRSTVWY"
+] + [
+    (f"Mole%_{property_name}", property_name, -1) for property_name in pepstats_properties
+] + [
+    ("Residues", "Molecular weight", 7),
+    ("Average_Residue_Weight", "Average Residue Weight", 5),
+    ("Charge", "Average Residue Weight", 8),
+    ("A280_Molar_Extinction_Reduced", "A280 Molar Extinction Coefficients", 6),
+    ("A280_Molar_Extinction_Cystine_Bridges", "A280 Molar Extinction Coefficients", 8),
+    ("A280_Extinction_1mg/ml_Reduced", "A280 Extinction Coefficients 1mg/ml", 6),
+    ("A280_Extinction_1mg/ml_Cystine_Bridges", "A280 Extinction Coefficients 1mg/ml", 8),
+    # pepstats prints one of the two lines, depending on the predicted solubility
+    ("Inclusion_Bodies_Probability", "Probability of expression in inclusion bodies", -1),
+    ("Inclusion_Bodies_Improbability", "Improbability of expression in inclusion bodies", -1),
+] + [
+    (f"Number_{name}", f"{code} = {name3}", 4) for code, name3, name in pepstats_residues
+] + [
+    (f"Residue_Mole%_{name}", f"{code} = {name3}", 5) for code, name3, name in pepstats_residues
+] + [
+    (f"DayhoffStat_{name}", f"{code} = {name3}", 6) for code, name3, name in pepstats_residues
+] + [
+    (f"Number_{property_name}", property_name, -2) for property_name in pepstats_properties
+]
+pepstats_field_names = [column_name for column_name, _, _ in pepstats_fields]
+
+# Columns of Table_01 (and rows of Table_02) by default: the v1.0.0 set, in pepstats report order
+pepstats_table_columns = pepstats_field_names[:32]
+
+# Value written for a selected column whose report line is missing (e.g. the inclusion bodies line not printed)
+pepstats_missing_value = "NA"
+
+# Table columns of a selection: a comma separated string or list of column names, "default" or "all". Protein_ID
+# is always the first column.
+def select_pepstats_columns(selection=None):
+    if selection is None or selection == "default":
+        return list(pepstats_table_columns)
+    if selection == "all":
+        return list(pepstats_field_names)
+    if isinstance(selection, str):
+        selection = [column_name.strip() for column_name in selection.split(",") if column_name.strip()]
+    unknown = [column_name for column_name in selection if column_name not in pepstats_field_names]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    columns = ["Protein_ID"]
+    for column_name in selection:
+        if column_name not in columns:
+            columns.append(column_name)
+    return columns
+
+# Line classifier of a column selection (Protein_ID first): a single alternation over the labels of the report lines
+# holding the selected columns, in report order, anchored at the start of the line so each report line is classified
+# by one match. Lines of unselected columns do not match and are never split. Returns the compiled classifier and,
+# per line group, the record slot and word index of the first value of the line with the (slot, word index) pairs
+# of its other values; line_00 is the PEPSTATS line starting every protein.
+@functools.lru_cache(maxsize=None)
+def pepstats_report_parser(columns):
+    field_lines = {column_name: (label, word) for column_name, label, word in pepstats_fields}
+    selected_labels = {field_lines[column_name][0] for column_name in columns}
+    line_slots = {label: [] for _, label, _ in pepstats_fields if label in selected_labels}
+    for slot, column_name in enumerate(columns):
+        label, word = field_lines[column_name]
+        line_slots[label].append((slot, word - 1 if word > 0 else word))
+    classifier = re.compile("|".join(f"(?P<line_{index:02d}>{re.escape(label)})" for index, label in enumerate(line_slots)))
+    return classifier, {f"line_{index:02d}": (slots[0][0], slots[0][1], tuple(slots[1:])) for index, slots in enumerate(line_slots.values())}
+
+# Read a pepstats report line by line and yield one record (list of Table_01 values) per protein
+def read_pepstats_report(report_file, columns=pepstats_table_columns):
+    with open(report_file, 'r') as input_file:
+        yield from parse_pepstats_report(input_file, columns)
+
+# Columns that may be missing from a well-formed report: pepstats prints only one of the two inclusion bodies lines
+pepstats_optional_columns = {"Inclusion_Bodies_Probability", "Inclusion_Bodies_Improbability"}
+
+# True when pepstats reported the protein of a FASTA Protein_ID under report_id: pepstats names NCBI and UniProt
+# style proteins (db|accession|name) after one of their fields
+def is_reported_protein_id(report_id, protein_id):
+    return report_id == protein_id or report_id in protein_id.split('|')
+
+# Protein_ID pepstats reports for a FASTA Protein_ID (the first word of the header): EMBOSS names NCBI and UniProt
+# style proteins (db|accession|name) after their last field, and other proteins after the whole first word
+def pepstats_protein_id(protein_id):
+    if '|' not in protein_id:
+        return protein_id
+    fields = [field for field in protein_id.split('|') if field]
+    return fields[-1] if fields else protein_id
+
+# Next freshly computed record of a planned run (result cache or previous release), which must be the record of
+# protein_id, or None for a quarantined protein (see checked_records)
+def next_planned_record(fresh_records, protein_id):
+    record = next(fresh_records, False)
+    if record is False:
+        raise RuntimeError(f"No record was computed for {protein_id}: it is missing from the pepstats report")
+    if record is not None and not is_reported_protein_id(record[0], protein_id):
+        raise RuntimeError(f"The record of {record[0]} was found where {protein_id} was expected: {protein_id} is missing from the pepstats report")
+    return record
+
+# Problem of a record extracted from a pepstats report or computed by the native engine, or None when every value
+# is present and a number (or "None", printed by pepstats for values it cannot compute)
+def pepstats_record_problem(record, columns=pepstats_table_columns):
+    if len(record) != len(columns):
+        return f"{len(record)} values for {len(columns)} columns"
+    for column_name, value in zip(columns[1:], record[1:]):
+        if value == pepstats_missing_value:
+            if column_name not in pepstats_optional_columns:
+                return f"no report line for {column_name}"
+        elif value != "None":
+            try:
+                float(value)
+            except ValueError:
+                return f"value of {column_name} is not a number: {value}"
+    return None
+
+# Yield one record per protein, holding the values of the selected columns, from the lines of a pepstats report
+def parse_pepstats_report(lines, columns=pepstats_table_columns):
+    classifier, line_slots = pepstats_report_parser(tuple(columns))
+    classify = classifier.match
+    empty_record = [pepstats_missing_value] * len(columns)
+    record = None
+    for line in lines:
+        match = classify(line)
+        if match is None:
+            continue
+        # Each "PEPSTATS of <Protein_ID>" line starts the next protein
+        if match.lastgroup == "line_00":
+            if record is not None:
+                yield record
+            record = empty_record.copy()
+        slot, word, other_slots = line_slots[match.lastgroup]
+        words = line.split()
+        record[slot] = words[word]
+        for slot, word in other_slots:
+            record[slot] = words[word]
+    if record is not None:
+        yield record
+
+# Run pepstats on FASTA data with its report going to a pipe (-outfile stdout), read by the calling thread in
+# blocks put on output_queue (None once the report ends). The queue is bounded, so pepstats blocks on its pipe
+# while the consumer is behind; setting stop abandons the run.
+def stream_pepstats(sequence_data, output_queue, stop, block_size=256 * 1024):
+    import queue
+    pepstats_command = [
+        "pepstats",
+        "-sequence", "fasta::stdin",
+        "-outfile", "stdout"
+    ]
+    process = None
+    try:
+        with open(os.devnull, 'w') as devnull:
+            process = subprocess.Popen(pepstats_command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull)
+        feeder = threading.Thread(target=feed_pipe, args=(io.BytesIO(sequence_data), process.stdin), daemon=True)
+        feeder.start()
+        for block in iter(lambda: process.stdout.read(block_size), b''):
+            while not stop.is_set():
+                try:
+                    output_queue.put(block, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                process.kill()
+                break
+    finally:
+        if process is not None:
+            process.stdout.close()
+            process.wait()
+            feeder.join()
+        # The end of the report (or of a failed run, whose error the consumer gets from the future)
+        if not stop.is_set():
+            output_queue.put(None)
+
+# Pipelined pepstats run: the sequence file is cut into work units of about unit_size bytes of FASTA (see
+# batch_work_units) streamed through up to threads pepstats processes, two units per process in flight, and the
+# reports are parsed in proteome order while pepstats is still running. The report bytes are copied to report_file
+# as they are parsed. Memory stays bounded by the in-flight units and their queues of queue_blocks blocks.
+def read_pepstats_pipelined(sequence_file, report_file, threads=1, unit_size=4 * 1024 * 1024, queue_blocks=16, columns=pepstats_table_columns):
+    import codecs
+    import queue
+    from concurrent.futures import ThreadPoolExecutor
+    stop = threading.Event()
+    units = (unit_fasta for unit_fasta, _ in batch_work_units([sequence_file], unit_size) if unit_fasta)
+    pending = deque()
+
+    def submit_units():
+        while len(pending) < 2 * threads:
+            unit_fasta = next(units, None)
+            if unit_fasta is None:
+                return
+            unit_queue = queue.Queue(maxsize=queue_blocks)
+            pending.append((executor.submit(stream_pepstats, unit_fasta, unit_queue, stop), unit_queue))
+
+    # Report lines in order, across the units: the oldest unit is read while the next ones run
+    def report_lines(report):
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        partial_line = ''
+        submit_units()
+        while pending:
+            future, unit_queue = pending.popleft()
+            submit_units()
+            for block in iter(unit_queue.get, None):
+                report.write(block)
+                lines = (partial_line + decoder.decode(block)).split('\n')
+                partial_line = lines.pop()
+                yield from lines
+            future.result()
+        if partial_line:
+            yield partial_line
+
+    executor = ThreadPoolExecutor(max_workers=threads)
+    try:
+        with open(report_file, 'wb') as report:
+            yield from parse_pepstats_report(report_lines(report), columns)
+    finally:
+        stop.set()
+        for future, _ in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+# Spill files holding the Table_02 rows while records arrive, one per column
+def table_02_spill_files(spill_prefix, columns=pepstats_table_columns):
+    return [f"{spill_prefix}_{index:02d}.out" for index in range(len(columns))]
+
+# Table_02 rows are copied from the spill files through a fixed buffer, in binary mode so that no decoded copy of a
+# row is held next to its bytes
+table_02_copy_buffer_size = 1024 * 1024
+
+# Resident set size of this process in MB (from /proc, or the peak resident set size where /proc is missing)
+def process_rss_mb():
+    try:
+        with open("/proc/self/statm", 'r') as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        if resource is None:
+            return 0.0
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+# Buffer size of each spill file: the spill files share what remains of the memory ceiling once the memory already
+# used by the process (interpreter, modules, earlier stages) and the Table_02 copy buffer are set aside, with half of
+# it kept as headroom for the records in flight and the text layer of each file
+def table_02_spill_buffer_size(max_memory_mb, columns=pepstats_table_columns):
+    available = (max_memory_mb - process_rss_mb()) * 1024 * 1024 - table_02_copy_buffer_size
+    return max(io.DEFAULT_BUFFER_SIZE, int(available) // (2 * len(columns)))
+
+# Write Table_01 row by row as records arrive, and append every value to the spill file of its Table_02 row
+def write_table_01_and_spills(records, table_01_file, spill_prefix, max_memory_mb=256, columns=pepstats_table_columns):
+    spill_buffer_size = table_02_spill_buffer_size(max_memory_mb, columns)
+    number_of_records = 0
+
+    with open(table_01_file, 'w') as table_01, contextlib.ExitStack() as stack:
+        spills = [stack.enter_context(open(spill_file, 'w', buffering=spill_buffer_size)) for spill_file in table_02_spill_files(spill_prefix, columns)]
+        table_01.write('\t'.join(columns) + '\n')
+        for record in records:
+            table_01.write('\t'.join(record) + '\n')
+            # Table_02 values keep the trailing space of the v1.0.0 layout, except the last value of each row
+            separator = ' \t' if number_of_records else ''
+            for spill, value in zip(spills, record):
+                spill.write(separator + value)
+            number_of_records += 1
+
+    return number_of_records
+
+# Assemble Table_02 (one row per column) from the spill files, copying them through a buffer of at most
+# table_02_copy_buffer_size bytes (less under very small memory ceilings)
+def assemble_table_02(table_02_file, spill_prefix, max_memory_mb=256, columns=pepstats_table_columns):
+    copy_buffer_size = max(io.DEFAULT_BUFFER_SIZE, min(table_02_copy_buffer_size, max_memory_mb * 1024 * 1024 // 16))
+
+    with open(table_02_file, 'wb') as table_02:
+        for column_name, spill_file in zip(columns, table_02_spill_files(spill_prefix, columns)):
+            table_02.write(column_name.encode() + b'\t')
+            with open(spill_file, 'rb') as spill:
+                shutil.copyfileobj(spill, table_02, copy_buffer_size)
+            table_02.write(b'\n')
+            os.remove(spill_file)
+
+# Write Table_01 and Table_02 from a stream of records, with memory use bounded by max_memory_mb whatever the
+# number of proteins
+def write_pepstats_tables(records, table_01_file, table_02_file, spill_prefix, max_memory_mb=256, columns=pepstats_table_columns):
+    number_of_records = write_table_01_and_spills(records, table_01_file, spill_prefix, max_memory_mb, columns)
+    assemble_table_02(table_02_file, spill_prefix, max_memory_mb, columns)
+    return number_of_records
+
+# Average residue masses (Da) used by the native engine, following the EMBOSS Eamino.dat data file
+native_residue_masses = {
+    "A": 71.0788, "B": 114.5962, "C": 103.1388, "D": 115.0886, "E": 129.1155, "F": 147.1766, "G": 57.0519,
+    "H": 137.1411, "I": 113.1594, "J": 113.1594, "K": 128.1741, "L": 113.1594, "M": 131.1926, "N": 114.1038,
+    "O": 237.3018, "P": 97.1167, "Q": 128.1307, "R": 156.1875, "S": 87.0782, "T": 101.1051, "U": 150.0388,
+    "V": 99.1326, "W": 186.2132, "X": 110.0000, "Y": 163.1760, "Z": 128.6231,
+}
+native_water_mass = 18.01528
+
+# pK values used for the isoelectric point, following the EMBOSS Epk.dat data file
+native_pk_amino_terminus = 8.6
+native_pk_carboxyl_terminus = 3.6
+native_pk_positive = {"H": 6.5, "K": 10.8, "R": 12.5}
+native_pk_negative = {"C": 8.5, "D": 3.9, "E": 4.1, "Y": 10.1}
+
+# Residue columns of Table_01, with the pepstats report field extracted for each of them
+# (Ala is read from the Mole% field, the remaining residues from the Number field)
+native_residue_columns = [
+    ("A", "mole"), ("C", "number"), ("D", "number"), ("E", "number"), ("F", "number"), ("G", "number"),
+    ("H", "number"), ("I", "number"), ("K", "number"), ("L", "number"), ("M", "number"), ("N", "number"),
+    ("P", "number"), ("Q", "number"), ("R", "number"), ("S", "number"), ("T", "number"), ("V", "number"),
+    ("W", "number"), ("Y", "number"),
+]
+
+# Residue classes of Table_01, as defined in the pepstats report
+native_property_classes = [
+    ("Tiny", "ACGST"),
+    ("Small", "ABCDGNPSTV"),
+    ("Aliphatic", "AILV"),
+    ("Aromatic", "FHWY"),
+    ("Non-polar", "ACFGILMPVWY"),
+    ("Polar", "DEHKNQRSTZ"),
+    ("Charged", "BDEHKRZ"),
+    ("Basic", "HKR"),
+    ("Acidic", "BDEZ"),
+]
+
+# Read a FASTA file (plain, gzip, bgzip or zstd compressed, or "-" for standard input) and yield (Protein_ID, sequence)
+# pairs, using the first word of the header as the identifier
+def read_fasta_records(fasta_file):
+    protein_id = None
+    sequence_lines = []
+    with open_sequence_input(fasta_file) as input_file:
+        for line in input_file:
+            if line.startswith(b'>'):
+                if protein_id is not None:
+                    yield protein_id, b''.join(sequence_lines)
+                header = line[1:].split()
+                protein_id = header[0].decode() if header else ""
+                sequence_lines = []
+            elif protein_id is not None:
+                sequence_lines.append(line.strip().replace(b' ', b''))
+    if protein_id is not None:
+        yield protein_id, b''.join(sequence_lines)
+
+# Yield (Protein_ID, sequence) pairs from a FASTA file path, or from an iterable of (Protein_ID, sequence) pairs
+# whose sequences may be str or bytes
+def read_sequence_records(source):
+    if isinstance(source, (str, bytes, os.PathLike)):
+        yield from read_fasta_records(source)
+        return
+    for protein_id, sequence in source:
+        if isinstance(sequence, str):
+            sequence = sequence.encode()
+        yield str(protein_id), sequence
+
+# Import NumPy for the native engine, with an explicit message when it is missing
+def import_numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("The native engine requires NumPy (pip install numpy).")
+    return np
+
+# Compute the Table_01 values (all columns but Protein_ID) of a batch of sequences with vectorized residue counting,
+# as a float64 matrix with one row per sequence
+def compute_native_values(np, sequences):
+    # Byte lookup table mapping residue letters (either case) to 0..25 and everything else to 26
+    lookup_table = np.full(256, 26, dtype=np.intp)
+    for index, residue in enumerate(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ"):
+        lookup_table[residue] = index
+        lookup_table[residue + 32] = index
+
+    lengths = np.fromiter((len(sequence) for sequence in sequences), dtype=np.intp, count=len(sequences))
+    residues = lookup_table[np.frombuffer(b''.join(sequences), dtype=np.uint8)]
+    record_index = np.repeat(np.arange(len(sequences)), lengths)
+    counts = np.bincount(record_index * 27 + residues, minlength=len(sequences) * 27).reshape(-1, 27)[:, :26]
+
+    def column(residue):
+        return counts[:, ord(residue) - ord("A")].astype(np.float64)
+
+    masses = np.array([native_residue_masses[chr(ord("A") + index)] for index in range(26)])
+    molecular_weight = counts @ masses + native_water_mass
+
+    # Bisection on the net charge, which decreases monotonically with pH
+    def net_charge(ph):
+        charge = 1.0 / (1.0 + 10.0 ** (ph - native_pk_amino_terminus))
+        charge -= 1.0 / (1.0 + 10.0 ** (native_pk_carboxyl_terminus - ph))
+        for residue, pk in native_pk_positive.items():
+            charge += column(residue) / (1.0 + 10.0 ** (ph - pk))
+        for residue, pk in native_pk_negative.items():
+            charge -= column(residue) / (1.0 + 10.0 ** (pk - ph))
+        return charge
+
+    ph_low = np.zeros(len(sequences))
+    ph_high = np.full(len(sequences), 14.0)
+    for _ in range(50):
+        ph_middle = (ph_low + ph_high) / 2.0
+        positive = net_charge(ph_middle) > 0.0
+        ph_low = np.where(positive, ph_middle, ph_low)
+        ph_high = np.where(positive, ph_high, ph_middle)
+    isoelectric_point = (ph_low + ph_high) / 2.0
+
+    residue_values = [
+        100.0 * column(residue) / lengths if field == "mole" else column(residue)
+        for residue, field in native_residue_columns
+    ]
+    property_values = [
+        100.0 * sum(column(residue) for residue in members) / lengths
+        for _, members in native_property_classes
+    ]
+
+    return np.column_stack([molecular_weight, isoelectric_point, *residue_values, *property_values])
+
+# Number formats of the Table_01 values, matching the precision printed in the pepstats report
+native_value_formats = ["{:.2f}", "{:.4f}"] + ["{:.3f}" if field == "mole" else "{:.0f}" for _, field in native_residue_columns] + ["{:.3f}"] * len(native_property_classes)
+
+# Compute the Table_01 records (lists of formatted values) of a batch of sequences
+# Table_01 records of a batch of sequences, named as pepstats names them (see pepstats_protein_id)
+def compute_native_batch(np, protein_ids, sequences):
+    values = compute_native_values(np, sequences)
+    for protein_id, row in zip(protein_ids, values.tolist()):
+        yield [pepstats_protein_id(protein_id)] + [value_format.format(value) for value_format, value in zip(native_value_formats, row)]
+
+# Yield batches of (Protein_ID list, sequence list) as the native engine sees them; a batch is closed at batch_size
+# sequences or batch_residues residues, which bounds the memory of the vectorized counting
+def native_sequence_batches(source, batch_size=20000, batch_residues=2 * 1024 * 1024):
+    protein_ids = []
+    sequences = []
+    residues = 0
+    for protein_id, sequence in read_sequence_records(source):
+        # pepstats does not report empty sequences, and drops the terminal stop codon
+        sequence = sequence.rstrip(b'*')
+        if not sequence:
+            continue
+        protein_ids.append(protein_id)
+        sequences.append(sequence)
+        residues += len(sequence)
+        if len(sequences) == batch_size or residues >= batch_residues:
+            yield protein_ids, sequences
+            protein_ids = []
+            sequences = []
+            residues = 0
+    if sequences:
+        yield protein_ids, sequences
+
+# Compute Table_01 records straight from the FASTA file (or (Protein_ID, sequence) pairs), one batch at a time
+def compute_native_pepstats(source, batch_size=20000):
+    np = import_numpy()
+    for protein_ids, sequences in native_sequence_batches(source, batch_size):
+        yield from compute_native_batch(np, protein_ids, sequences)
+
+# Keep the selected columns of native records, which hold the v1.0.0 Table_01 columns
+def select_native_columns(records, columns=pepstats_table_columns):
+    if list(columns) == pepstats_table_columns:
+        return records
+    indices = [pepstats_table_columns.index(column_name) for column_name in columns]
+    return ([record[index] for index in indices] for record in records)
+
+# Maximum differences accepted between native and EMBOSS values, in Table_01 column order
+native_validation_tolerances = [None, 0.05, 0.01] + [0.0015 if field == "mole" else 0 for _, field in native_residue_columns] + [0.0015] * len(native_property_classes)
+
+# Compare the records computed by the native engine against the records extracted from an EMBOSS run. Records are
+# paired by Protein_ID (see is_reported_protein_id), the native record of each EMBOSS record being looked for among
+# the next lookahead native records, so a protein missing from either engine is reported as such (a Protein_ID row
+# with None for the engine without it) and never shifts the pairs that follow
+def validate_native_against_emboss(emboss_records, native_records, validation_file, lookahead=1000):
+    validated_proteins = 0
+    mismatches = 0
+    native_records = iter(native_records)
+    window = deque()
+
+    with open(validation_file, 'w') as output_file:
+        output_file.write("Protein_ID\tColumn\tEMBOSS_Value\tNative_Value\tTolerance\n")
+        for emboss_entry in emboss_records:
+            while len(window) < lookahead:
+                native_entry = next(native_records, None)
+                if native_entry is None:
+                    break
+                window.append(native_entry)
+            position = next((index for index, native_entry in enumerate(window) if native_entry[0] == emboss_entry[0] or is_reported_protein_id(emboss_entry[0], native_entry[0]) or is_reported_protein_id(native_entry[0], emboss_entry[0])), None)
+            if position is None:
+                output_file.write(f"{emboss_entry[0]}\tProtein_ID\t{emboss_entry[0]}\tNone\tNone\n")
+                mismatches += 1
+                continue
+            # The native records before the one of this protein have no EMBOSS record
+            for _ in range(position):
+                native_entry = window.popleft()
+                output_file.write(f"{native_entry[0]}\tProtein_ID\tNone\t{native_entry[0]}\tNone\n")
+                mismatches += 1
+            native_entry = window.popleft()
+            validated_proteins += 1
+            for column_name, tolerance, emboss_value, native_value in zip(pepstats_table_columns[1:], native_validation_tolerances[1:], emboss_entry[1:], native_entry[1:]):
+                try:
+                    # Molecular weight tolerance is a percentage of the EMBOSS value, all other tolerances are absolute
+                    scale = float(emboss_value) / 100.0 if column_name == "Molecular_weight" else 1.0
+                    within_tolerance = abs(float(emboss_value) - float(native_value)) <= tolerance * scale
+                except ValueError:
+                    within_tolerance = emboss_value == native_value
+                if not within_tolerance:
+                    output_file.write(f"{emboss_entry[0]}\t{column_name}\t{emboss_value}\t{native_value}\t{tolerance}\n")
+                    mismatches += 1
+
+        for native_entry in itertools.chain(window, native_records):
+            output_file.write(f"{native_entry[0]}\tProtein_ID\tNone\t{native_entry[0]}\tNone\n")
+            mismatches += 1
+
+    return validated_proteins, mismatches
+
+# Arrow types of the Table_01 columns written to the columnar formats (Mole% values fit float32 without loss)
+def columnar_table_schema(pa, columns=pepstats_table_columns):
+    fields = [pa.field("Protein_ID", pa.dictionary(pa.int32(), pa.string()))]
+    for column_name in columns[1:]:
+        column_type = pa.float64() if column_name in ("Molecular_weight", "Isoelectric_Point") else pa.float32()
+        fields.append(pa.field(column_name, column_type))
+    return pa.schema(fields)
+
+# Convert a table value to float, or None when pepstats reported no number (e.g. "Isoelectric Point = None")
+def columnar_value(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+# Pass records through unchanged while writing them to a typed Parquet or Arrow IPC copy of Table_01,
+# one row group (record batch) of batch_size records at a time
+def write_columnar_records(records, output_file, output_format, batch_size=65536, columns=pepstats_table_columns):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("The parquet and arrow output formats require PyArrow (pip install pyarrow).")
+
+    schema = columnar_table_schema(pa, columns)
+
+    if output_format == "parquet":
+        writer = pq.ParquetWriter(output_file, schema)
+    else:
+        writer = pa.ipc.new_file(output_file, schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+
+    # The Arrow IPC file format does not allow a dictionary to be replaced between record batches, so the Protein_ID
+    # dictionary of an Arrow file grows across batches and each batch adds its new Protein_IDs as a delta (Parquet
+    # encodes each row group on its own)
+    dictionary_positions = {}
+    dictionary = [pa.array([], type=pa.string())]
+
+    def protein_id_column(batch):
+        protein_ids = [record[0] for record in batch]
+        if output_format == "parquet":
+            return pa.array(protein_ids, type=pa.string()).dictionary_encode()
+        new_ids = []
+        indices = []
+        for protein_id in protein_ids:
+            position = dictionary_positions.get(protein_id)
+            if position is None:
+                position = dictionary_positions[protein_id] = len(dictionary_positions)
+                new_ids.append(protein_id)
+            indices.append(position)
+        if new_ids:
+            dictionary[0] = pa.concat_arrays([dictionary[0], pa.array(new_ids, type=pa.string())])
+        return pa.DictionaryArray.from_arrays(pa.array(indices, type=pa.int32()), dictionary[0])
+
+    def flush(batch):
+        columns = [protein_id_column(batch)]
+        for index in range(1, len(schema)):
+            values = [columnar_value(record[index]) if index < len(record) else None for record in batch]
+            columns.append(pa.array(values, type=schema.field(index).type))
+        writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+
+    try:
+        batch = []
+        for record in records:
+            batch.append(record)
+            yield record
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    finally:
+        writer.close()
+
+# Binary index of Table_01 for random access by Protein_ID: a header (magic, then the length of a JSON description
+# of the layout), the Protein_IDs as sorted fixed-width byte strings, and the numeric columns as a little-endian
+# float32 matrix in the same order. Values pepstats reported as text (e.g. "None") are NaN. Sections are 64-byte aligned.
+pepstats_index_magic = b"PEPSTIDX"
+pepstats_index_alignment = 64
+
+def index_padding(offset):
+    return -offset % pepstats_index_alignment
+
+# Write the binary index of a Table_01 file, converting batch_size rows at a time; the rows are sorted by
+# Protein_ID through an unsorted float32 spill file next to index_file
+def write_pepstats_index(table_01_file, index_file, batch_size=65536):
+    import json
+    np = import_numpy()
+    spill_file = f"{index_file}.unsorted"
+    protein_ids = []
+
+    with open(table_01_file, 'r') as input_file, open(spill_file, 'wb') as spill:
+        value_columns = next(input_file, '\t'.join(pepstats_table_columns)).rstrip('\n').split('\t')[1:]
+        number_of_columns = len(value_columns)
+        while True:
+            lines = list(itertools.islice(input_file, batch_size))
+            if not lines:
+                break
+            protein_ids.extend(line.split('\t', 1)[0].encode() for line in lines)
+            try:
+                values = np.loadtxt(lines, dtype='<f4', delimiter='\t', usecols=range(1, number_of_columns + 1), comments=None, ndmin=2)
+            except ValueError:
+                # Some value is not a number: convert the batch value by value
+                rows = [line.rstrip('\n').split('\t') for line in lines]
+                values = np.array([[columnar_value(row[index]) if index < len(row) else None for index in range(1, number_of_columns + 1)] for row in rows], dtype='<f4')
+            spill.write(values.reshape(-1, number_of_columns).tobytes())
+
+    id_array = np.array(protein_ids, dtype=f"S{max(map(len, protein_ids), default=1)}")
+    del protein_ids
+    order = np.argsort(id_array, kind='stable')
+
+    # The description is padded with spaces so that the Protein_IDs start on the alignment
+    description = json.dumps({
+        "version": 1,
+        "rows": len(id_array),
+        "columns": value_columns,
+        "id_width": id_array.dtype.itemsize,
+    }).encode()
+    description += b' ' * index_padding(len(pepstats_index_magic) + 8 + len(description))
+
+    with open(index_file, 'wb') as output_file:
+        output_file.write(pepstats_index_magic + len(description).to_bytes(8, 'little') + description)
+        output_file.write(id_array[order].tobytes() + b'\0' * index_padding(id_array.nbytes))
+        if len(id_array):
+            unsorted_values = np.memmap(spill_file, dtype='<f4', mode='r', shape=(len(id_array), number_of_columns))
+            for start in range(0, len(order), batch_size):
+                output_file.write(unsorted_values[order[start:start + batch_size]].tobytes())
+            del unsorted_values
+    os.remove(spill_file)
+
+    return len(id_array)
+
+# Read-only view of a binary index (see write_pepstats_index): the file is memory mapped, nothing is parsed
+# beyond its header, and lookups are binary searches over the sorted Protein_IDs
+#
+#     with pepstats_tables.PepStatsIndex("Homo_sapiens.GRCh38.pep.all.fa_PepStats_Tables.05_PepStats_Index") as index:
+#         index["ENSP00000354587.3"]["Isoelectric_Point"]
+#         found, values = index.lookup_many(protein_ids)
+class PepStatsIndex:
+    def __init__(self, index_file):
+        import json
+        import mmap
+        self.np = import_numpy()
+        with open(index_file, 'rb') as input_file:
+            self.mapping = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mapping[:len(pepstats_index_magic)] != pepstats_index_magic:
+            self.mapping.close()
+            raise ValueError(f"Not a PepStats_Tables binary index: {index_file}")
+        header_length = len(pepstats_index_magic) + 8
+        description_length = int.from_bytes(self.mapping[len(pepstats_index_magic):header_length], 'little')
+        layout = json.loads(self.mapping[header_length:header_length + description_length])
+        ids_offset = header_length + description_length
+        ids_length = layout["rows"] * layout["id_width"]
+        values_offset = ids_offset + ids_length + index_padding(ids_length)
+        self.columns = layout["columns"]
+        self.protein_ids = self.np.frombuffer(self.mapping, dtype=f"S{layout['id_width']}", count=layout["rows"], offset=ids_offset)
+        self.values = self.np.frombuffer(self.mapping, dtype='<f4', count=layout["rows"] * len(self.columns), offset=values_offset).reshape(layout["rows"], len(self.columns))
+
+    def __len__(self):
+        return len(self.protein_ids)
+
+    def __contains__(self, protein_id):
+        return self.positions([protein_id])[0] >= 0
+
+    # Row of a single Protein_ID as a {column: value} dict
+    def __getitem__(self, protein_id):
+        position = self.positions([protein_id])[0]
+        if position < 0:
+            raise KeyError(protein_id)
+        return dict(zip(self.columns, self.values[position].tolist()))
+
+    def get(self, protein_id, default=None):
+        try:
+            return self[protein_id]
+        except KeyError:
+            return default
+
+    # Row positions of a batch of Protein_IDs (-1 for those not in the index), with one vectorized binary search
+    def positions(self, protein_ids):
+        np = self.np
+        keys = np.array([protein_id.encode() if isinstance(protein_id, str) else protein_id for protein_id in protein_ids], dtype=bytes)
+        if len(keys) == 0 or len(self.protein_ids) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.protein_ids, keys), len(self.protein_ids) - 1)
+        return np.where(self.protein_ids[positions] == keys, positions, -1)
+
+    # Values of a batch of Protein_IDs: a boolean found mask and a float32 matrix (NaN rows for IDs not found)
+    def lookup_many(self, protein_ids):
+        np = self.np
+        positions = self.positions(protein_ids)
+        found = positions >= 0
+        values = np.full((len(positions), len(self.columns)), np.nan, dtype=np.float32)
+        values[found] = self.values[positions[found]]
+        return found, values
+
+    def close(self):
+        # The arrays are views of the mapping, which cannot be closed while they exist
+        self.protein_ids = None
+        self.values = None
+        self.mapping.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Normalize a sequence the way pepstats reads it (upper case, no terminal stop codon) and return its SHA-256 digest
+def sequence_digest(sequence):
+    import hashlib
+    return hashlib.sha256(sequence.upper().rstrip(b'*')).hexdigest()
+
+# Version of the EMBOSS installation, probed once per process
+@functools.lru_cache(maxsize=None)
+def emboss_version():
+    try:
+        result = subprocess.run(["embossversion"], capture_output=True, text=True)
+        return result.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+# Version string stored with every cached result, so results of different engines, EMBOSS releases or column
+# selections never mix
+def result_cache_engine_version(engine, columns=pepstats_table_columns):
+    engine_version = f"native-{__version__}" if engine == "native" else f"emboss-{emboss_version()}"
+    if list(columns) != pepstats_table_columns:
+        import hashlib
+        engine_version += "-columns-" + hashlib.sha256(','.join(columns).encode()).hexdigest()[:16]
+    return engine_version
+
+# Open (or create) the SQLite result cache stored in cache_dir
+def open_result_cache(cache_dir):
+    import sqlite3
+    os.makedirs(cache_dir, exist_ok=True)
+    connection = sqlite3.connect(os.path.join(cache_dir, "PepStats_Tables.cache.sqlite"))
+    connection.execute("CREATE TABLE IF NOT EXISTS results (digest TEXT NOT NULL, engine TEXT NOT NULL, vals TEXT NOT NULL, last_used INTEGER NOT NULL, fasta_id TEXT, report_id TEXT, PRIMARY KEY (digest, engine))")
+    connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+    # Caches created before the Protein_IDs were stored get the two columns, empty for their results
+    existing_columns = {row[1] for row in connection.execute("PRAGMA table_info(results)")}
+    for column_name in ("fasta_id", "report_id"):
+        if column_name not in existing_columns:
+            connection.execute(f"ALTER TABLE results ADD COLUMN {column_name} TEXT")
+    return connection
+
+# Look up a batch of digests and return, for those found, the cached values (tab separated, Protein_ID excluded)
+# with the FASTA Protein_ID they were computed for and the Protein_ID the engine reported
+def lookup_result_cache(connection, engine_version, digests):
+    placeholders = ",".join("?" * len(digests))
+    rows = connection.execute(f"SELECT digest, vals, fasta_id, report_id FROM results WHERE engine = ? AND digest IN ({placeholders})", [engine_version, *digests])
+    return {digest: (values, fasta_id, report_id) for digest, values, fasta_id, report_id in rows}
+
+# Protein_ID to report for a cached result, or None when it is not known: pepstats names a protein after the first
+# word of its header, or after one of the fields of NCBI and UniProt style headers (db|accession|name), which is only
+# known for the header the result was computed for
+def cached_report_id(protein_id, result):
+    if '|' not in protein_id:
+        return protein_id
+    _, fasta_id, report_id = result
+    return report_id if fasta_id == protein_id else None
+
+# Split the proteome into cached proteins and proteins to compute: the plan file keeps the original order
+# (Protein_ID, digest, cached flag, reported Protein_ID of the cached proteins) and the proteins to compute are
+# written to miss_fasta_file
+def plan_cached_run(connection, engine_version, fasta_file, plan_file, miss_fasta_file, batch_size=500):
+    hits = 0
+    misses = 0
+
+    with open(plan_file, 'w') as plan, open(miss_fasta_file, 'wb') as miss_fasta:
+        def flush(batch):
+            nonlocal hits, misses
+            cached = lookup_result_cache(connection, engine_version, [digest for _, digest, _ in batch])
+            for protein_id, digest, sequence in batch:
+                report_id = cached_report_id(protein_id, cached[digest]) if digest in cached else None
+                if report_id is not None:
+                    hits += 1
+                    plan.write(f"{protein_id}\t{digest}\t1\t{report_id}\n")
+                else:
+                    misses += 1
+                    plan.write(f"{protein_id}\t{digest}\t0\t\n")
+                    miss_fasta.write(b'>' + protein_id.encode() + b'\n' + sequence + b'\n')
+
+        batch = []
+        for protein_id, sequence in read_fasta_records(fasta_file):
+            sequence = sequence.upper().rstrip(b'*')
+            # pepstats does not report empty sequences
+            if not sequence:
+                continue
+            batch.append((protein_id, sequence_digest(sequence), sequence))
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    return hits, misses
+
+# Yield the records of the planned run in the original order, taking cached values (with the Protein_ID the engine
+# reported when they were computed) or the next freshly computed record, which must be the record of the protein
+# planned (see next_planned_record); fresh records are added to the cache
+def assemble_cached_records(connection, engine_version, plan_file, fresh_records, batch_size=500):
+    run_stamp = time.time_ns()
+    fresh_records = iter(fresh_records)
+
+    def flush(batch):
+        cached = lookup_result_cache(connection, engine_version, [digest for _, digest, flag, _ in batch if flag == "1"])
+        fresh_rows = []
+        for protein_id, digest, flag, report_id in batch:
+            if flag == "1":
+                yield [report_id] + cached[digest][0].split('\t')
+                continue
+            record = next_planned_record(fresh_records, protein_id)
+            # Quarantined proteins (None, see checked_records) are not cached
+            if record is not None:
+                fresh_rows.append((digest, engine_version, '\t'.join(record[1:]), run_stamp, protein_id, record[0]))
+            yield record
+        connection.executemany("INSERT OR REPLACE INTO results (digest, engine, vals, last_used, fasta_id, report_id) VALUES (?, ?, ?, ?, ?, ?)", fresh_rows)
+        cached_digests = [(run_stamp, digest, engine_version) for _, digest, flag, _ in batch if flag == "1"]
+        connection.executemany("UPDATE results SET last_used = ? WHERE digest = ? AND engine = ?", cached_digests)
+
+    with open(plan_file, 'r') as plan:
+        batch = []
+        for line in plan:
+            batch.append(line.rstrip('\n').split('\t'))
+            if len(batch) == batch_size:
+                yield from flush(batch)
+                batch = []
+        if batch:
+            yield from flush(batch)
+
+    record = next(fresh_records, None)
+    if record is not None:
+        raise RuntimeError(f"The record of {record[0]} does not belong to any protein computed")
+    connection.commit()
+
+# Evict the least recently used results until the cache is smaller than max_size_mb, and return the number evicted
+def evict_result_cache(connection, max_size_mb, batch_size=1000):
+    max_size = max_size_mb * 1024 * 1024
+    evicted = 0
+
+    def cache_size():
+        page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+        page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - freelist_count) * page_size
+
+    while cache_size() > max_size:
+        deleted = connection.execute("DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY last_used, rowid LIMIT ?)", (batch_size,)).rowcount
+        if deleted == 0:
+            break
+        evicted += deleted
+
+    connection.commit()
+    if evicted:
+        connection.execute("VACUUM")
+    return evicted
+
+# Previous release of a proteome for delta runs, as two hash indexes: the Protein_IDs of the previous FASTA to their
+# sequence digest and the Protein_ID reported in the previous Table_01, and the digests to the Table_01 values of the
+# previous Table_01 (tab separated, Protein_ID excluded, in the order of columns). Table_01 rows are matched to the
+# FASTA proteins as pepstats names them (see is_reported_protein_id); proteins without a Table_01 row are left out.
+# Either file may be compressed.
+def read_previous_release(previous_table_01, previous_fasta, columns=pepstats_table_columns):
+    fasta_digests = {}
+    # Protein_IDs pepstats may report for each protein: the whole Protein_ID, or a field of db|accession|name
+    # Protein_IDs, unless shared by several proteins (e.g. "sp")
+    fasta_ids = {}
+    for protein_id, sequence in read_fasta_records(previous_fasta):
+        sequence = sequence.upper().rstrip(b'*')
+        if sequence:
+            fasta_digests[protein_id] = sequence_digest(sequence)
+            for report_id in {protein_id, *protein_id.split('|')} - {''}:
+                fasta_ids[report_id] = protein_id if fasta_ids.get(report_id, protein_id) == protein_id else None
+
+    previous_ids = {}
+    previous_values = {}
+    with open_sequence_input(previous_table_01) as input_file:
+        header = next(input_file, b'').decode().rstrip('\n').split('\t')
+        missing_columns = [column_name for column_name in columns if column_name not in header]
+        if missing_columns:
+            raise ValueError(f"Column(s) missing from the previous Table_01: {', '.join(missing_columns)}")
+        same_columns = header == list(columns)
+        indices = [header.index(column_name) for column_name in columns[1:]]
+        for line in input_file:
+            line = line.decode().rstrip('\n')
+            report_id, _, values = line.partition('\t')
+            protein_id = fasta_ids.get(report_id)
+            if protein_id is None:
+                continue
+            digest = fasta_digests[protein_id]
+            if not same_columns:
+                row = line.split('\t')
+                values = '\t'.join(row[index] for index in indices)
+            previous_ids[protein_id] = (digest, report_id)
+            previous_values[digest] = values
+
+    return previous_ids, previous_values
+
+# Split the proteome into proteins whose values are taken from the previous release and proteins to compute: the
+# plan file keeps the original order (Protein_ID, digest, status, reused flag, reported Protein_ID of the reused
+# proteins), followed by the removed proteins, and the proteins to compute are written to compute_fasta_file. The
+# status (unchanged, added, changed) is given by the Protein_ID, while the values of any sequence of the previous
+# release are reused, whatever its Protein_ID, as long as the Protein_ID pepstats reports for it is known (see
+# cached_report_id). Returns the number of proteins of every status, and of proteins to compute
+def plan_delta_run(previous_ids, previous_values, fasta_file, plan_file, compute_fasta_file):
+    counts = dict.fromkeys(["unchanged", "added", "changed", "removed", "computed"], 0)
+    seen_ids = set()
+
+    with open(plan_file, 'w') as plan, open(compute_fasta_file, 'wb') as compute_fasta:
+        for protein_id, sequence in read_fasta_records(fasta_file):
+            sequence = sequence.upper().rstrip(b'*')
+            # pepstats does not report empty sequences
+            if not sequence:
+                continue
+            digest = sequence_digest(sequence)
+            previous = previous_ids.get(protein_id)
+            if previous is None:
+                status = "added"
+            else:
+                status = "unchanged" if previous[0] == digest else "changed"
+            if status == "unchanged":
+                report_id = previous[1]
+            elif digest in previous_values and '|' not in protein_id:
+                report_id = protein_id
+            else:
+                report_id = None
+            reused = report_id is not None
+            if not reused:
+                compute_fasta.write(b'>' + protein_id.encode() + b'\n' + sequence + b'\n')
+                counts["computed"] += 1
+            counts[status] += 1
+            seen_ids.add(protein_id)
+            plan.write(f"{protein_id}\t{digest}\t{status}\t{int(reused)}\t{report_id or ''}\n")
+
+        for protein_id, (previous_digest, previous_report_id) in previous_ids.items():
+            if protein_id not in seen_ids:
+                counts["removed"] += 1
+                plan.write(f"{protein_id}\t{previous_digest}\tremoved\t1\t{previous_report_id}\n")
+
+    return counts
+
+# Yield the records of the planned delta run in the original order, taking the previous values or the next freshly
+# computed record (see next_planned_record), and write the delta table (Protein_ID as in Table_01, Status, Column,
+# Previous_Value, Value): every value of the added and removed proteins, and for changed proteins their sequence
+# digests and every value that differs
+def assemble_delta_records(previous_ids, previous_values, plan_file, fresh_records, delta_file, columns=pepstats_table_columns):
+    fresh_records = iter(fresh_records)
+    value_columns = columns[1:]
+
+    with open(plan_file, 'r') as plan, open(delta_file, 'w') as delta:
+        delta.write("Protein_ID\tStatus\tColumn\tPrevious_Value\tValue\n")
+        for line in plan:
+            protein_id, digest, status, reused, report_id = line.rstrip('\n').split('\t')
+            if status == "removed":
+                for column_name, previous_value in zip(value_columns, previous_values[digest].split('\t')):
+                    delta.write(f"{report_id}\tremoved\t{column_name}\t{previous_value}\tNA\n")
+                continue
+
+            record = [report_id] + previous_values[digest].split('\t') if reused == "1" else next_planned_record(fresh_records, protein_id)
+            # Quarantined proteins (None, see checked_records) are left out of the delta
+            if record is None:
+                yield None
+                continue
+            if status == "added":
+                for column_name, value in zip(value_columns, record[1:]):
+                    delta.write(f"{record[0]}\tadded\t{column_name}\tNA\t{value}\n")
+            elif status == "changed":
+                previous_digest = previous_ids[protein_id][0]
+                delta.write(f"{record[0]}\tchanged\tSequence_SHA256\t{previous_digest}\t{digest}\n")
+                for column_name, previous_value, value in zip(value_columns, previous_values[previous_digest].split('\t'), record[1:]):
+                    if previous_value != value:
+                        delta.write(f"{record[0]}\tchanged\t{column_name}\t{previous_value}\t{value}\n")
+            yield record
+
+    record = next(fresh_records, None)
+    if record is not None:
+        raise RuntimeError(f"The record of {record[0]} does not belong to any protein computed")
+
+# Screen the proteins of a sequence file before they are analyzed: proteins without a Protein_ID, with an empty
+# sequence or with characters other than residue letters are passed to quarantine (Protein_ID, stage, reason), and
+# the others are written to screened_fasta_file (upper case, without the final stop). Returns the numbers of proteins
+# written and quarantined
+def screen_sequences(fasta_file, screened_fasta_file, quarantine):
+    screened = 0
+    quarantined = 0
+
+    with open(screened_fasta_file, 'wb') as output_file:
+        for protein_id, sequence in read_fasta_records(fasta_file):
+            sequence = sequence.upper().rstrip(b'*')
+            non_residues = sequence.translate(None, b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+            if not protein_id:
+                problem = "no Protein_ID"
+            elif not sequence:
+                problem = "empty sequence"
+            elif non_residues:
+                problem = f"non-standard residue(s): {''.join(sorted(set(non_residues.decode(errors='replace'))))}"
+            else:
+                output_file.write(b'>' + protein_id.encode() + b'\n' + sequence + b'\n')
+                screened += 1
+                continue
+            quarantine(protein_id, "screening", problem)
+            quarantined += 1
+
+    return screened, quarantined
+
+# Run pepstats on a list of (Protein_ID, sequence) in isolation: when pepstats fails, both halves of the list are
+# run separately, down to single proteins, which are quarantined, so one bad protein never loses its neighbours
+def run_pepstats_isolated(records, output_file, quarantine):
+    status = run_pepstats_piped(chunk_fasta_bytes(records), output_file)
+    if status == 0:
+        return
+    if len(records) == 1:
+        quarantine(records[0][0], "pepstats", f"pepstats failed (exit status {status})")
+        open(output_file, 'w').close()
+        return
+    half_output_files = [f"{output_file}.{half}" for half in range(2)]
+    run_pepstats_isolated(records[:len(records) // 2], half_output_files[0], quarantine)
+    run_pepstats_isolated(records[len(records) // 2:], half_output_files[1], quarantine)
+    with open(output_file, 'w') as merged_file:
+        for half_output_file in half_output_files:
+            with open(half_output_file, 'r') as half_output:
+                shutil.copyfileobj(half_output, merged_file)
+            os.remove(half_output_file)
+
+# Run pepstats on a sequence file and, when it fails, retry its proteins in isolation (see run_pepstats_isolated).
+# Returns True when the file was retried
+def run_pepstats_checked(sequence_file, output_file, quarantine):
+    if run_pepstats(sequence_file, output_file) == 0:
+        return False
+    run_pepstats_isolated(list(read_fasta_records(sequence_file)), output_file, quarantine)
+    return True
+
+# Match the records of an engine against the Protein_IDs of the proteins sent to it, in order, and check them (see
+# pepstats_record_problem): every protein yields its record, or None once quarantined (malformed record, or no record
+# at all), so that no record is ever paired with another protein. Records are looked for among the next lookahead
+# proteins (see is_reported_protein_id).
+def checked_records(records, expected_ids, quarantine, columns=pepstats_table_columns, lookahead=1000):
+    expected_ids = iter(expected_ids)
+    window = deque()
+
+    for record in records:
+        while len(window) < lookahead:
+            protein_id = next(expected_ids, None)
+            if protein_id is None:
+                break
+            window.append(protein_id)
+        position = next((index for index, protein_id in enumerate(window) if is_reported_protein_id(record[0], protein_id)), None)
+        if position is None:
+            quarantine(record[0], "extraction", "not among the proteins analyzed")
+            continue
+        # The proteins before the one of this record got no record
+        for _ in range(position):
+            quarantine(window.popleft(), "extraction", "missing from the pepstats report")
+            yield None
+        window.popleft()
+        problem = pepstats_record_problem(record, columns)
+        if problem is None:
+            yield record
+        else:
+            quarantine(record[0], "extraction", problem)
+            yield None
+
+    for protein_id in itertools.chain(window, expected_ids):
+        quarantine(protein_id, "extraction", "missing from the pepstats report")
+        yield None
+
+# Split a sequence file into chunks of chunk_size proteins and yield (chunk index, [(Protein_ID, sequence), ...])
+def sequence_chunks(sequence_file, chunk_size):
+    chunk = []
+    for record in read_fasta_records(sequence_file):
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# Serialize a chunk as FASTA (first word of each header only, as pepstats reports it)
+def chunk_fasta_bytes(chunk):
+    return b''.join(b'>' + protein_id.encode() + b'\n' + sequence + b'\n' for protein_id, sequence in chunk)
+
+# Read a chunk manifest (JSON lines: one header line describing the run, then one line per completed chunk)
+# and return the header and the completed chunks by index
+def read_chunk_manifest(manifest_file):
+    import json
+    if not os.path.isfile(manifest_file):
+        return None, {}
+    with open(manifest_file, 'r') as input_file:
+        lines = [json.loads(line) for line in input_file if line.endswith('\n')]
+    if not lines:
+        return None, {}
+    return lines[0], {entry["chunk"]: entry for entry in lines[1:]}
+
+# Append one line to a chunk manifest and make sure it reached the disk before returning
+def append_chunk_manifest(manifest_file, entry, mode='a'):
+    import json
+    with open(manifest_file, mode) as output_file:
+        output_file.write(json.dumps(entry, sort_keys=True) + '\n')
+        output_file.flush()
+        os.fsync(output_file.fileno())
+
+# Analyze the sequence file in chunks, keeping every finished chunk in chunk_dir and recording it in manifest_file,
+# so that a restarted run skips the chunks already done. Chunk outputs are pepstats reports (emboss) or Table_01
+# rows (native). Returns the chunk output files in proteome order and the number of chunks skipped.
+def run_resumable_chunks(sequence_file, chunk_dir, manifest_file, engine, threads=1, chunk_size=10000):
+    import hashlib
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    run_header = {
+        "sequence_file": os.path.basename(sequence_file),
+        "sequence_size": os.path.getsize(sequence_file),
+        "engine": engine,
+        "chunk_size": chunk_size,
+    }
+    manifest_header, completed_chunks = read_chunk_manifest(manifest_file)
+
+    # Chunks of a different proteome, engine or chunk size are never reused
+    if manifest_header != run_header:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+        append_chunk_manifest(manifest_file, run_header, mode='w')
+        completed_chunks = {}
+    os.makedirs(chunk_dir, exist_ok=True)
+
+    manifest_lock = threading.Lock()
+
+    def run_chunk(index, digest, chunk, output_file):
+        partial_file = f"{output_file}.part"
+        if engine == "native":
+            with open(partial_file, 'w') as output_handle:
+                for record in compute_native_pepstats(chunk):
+                    output_handle.write('\t'.join(record) + '\n')
+        else:
+            chunk_file = os.path.join(chunk_dir, f"chunk_{index:06d}.fa")
+            with open(chunk_file, 'wb') as output_handle:
+                output_handle.write(chunk_fasta_bytes(chunk))
+            status = run_pepstats(chunk_file, partial_file)
+            os.remove(chunk_file)
+            # A failed chunk is not recorded, so a resumed run analyzes it again
+            if status != 0 or not os.path.isfile(partial_file):
+                if os.path.isfile(partial_file):
+                    os.remove(partial_file)
+                raise RuntimeError(f"pepstats failed (exit status {status}) on chunk {index} of {run_header['sequence_file']}; resume the run to analyze it again")
+        # The chunk only counts as done once its complete output is in place
+        os.replace(partial_file, output_file)
+        with manifest_lock:
+            append_chunk_manifest(manifest_file, {"chunk": index, "digest": digest, "proteins": len(chunk)})
+
+    chunk_outputs = []
+    skipped_chunks = 0
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = set()
+        for index, chunk in enumerate(sequence_chunks(sequence_file, chunk_size)):
+            digest = hashlib.sha256(chunk_fasta_bytes(chunk)).hexdigest()
+            output_file = os.path.join(chunk_dir, f"chunk_{index:06d}.{'tsv' if engine == 'native' else 'out'}")
+            chunk_outputs.append(output_file)
+            completed_chunk = completed_chunks.get(index)
+            if completed_chunk is not None and completed_chunk["digest"] == digest and os.path.isfile(output_file):
+                skipped_chunks += 1
+                continue
+            pending.add(executor.submit(run_chunk, index, digest, chunk, output_file))
+            # Keep at most two chunks per thread in memory
+            if len(pending) >= 2 * threads:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+        for future in pending:
+            future.result()
+
+    return chunk_outputs, skipped_chunks
+
+# Read the Table_01 rows written by native chunks back as records
+def read_chunk_rows(chunk_outputs):
+    for chunk_output in chunk_outputs:
+        with open(chunk_output, 'r') as input_file:
+            for line in input_file:
+                yield line.rstrip('\n').split('\t')
+
+# NumPy structured array type of the compute_pepstats() results: Protein_ID and 31 float64 columns
+def pepstats_array_dtype(np, protein_id_length):
+    return np.dtype([("Protein_ID", f"U{max(protein_id_length, 1)}")] + [(column_name, np.float64) for column_name in pepstats_table_columns[1:]])
+
+# Compute the Table_01 values of a batch of proteins without writing to the working directory.
+# records is a FASTA file path or an iterable of (Protein_ID, sequence) pairs. The native engine runs in process
+# and returns unrounded values; the emboss engine runs pepstats in a temporary directory (threads pepstats shards)
+# and returns the values printed in its report. Values that pepstats reports as text (e.g. "None") become NaN.
+# Returns a NumPy structured array with the 32 Table_01 columns, or a pandas DataFrame when as_frame is True.
+def compute_pepstats(records, engine="native", threads=1, as_frame=False):
+    import tempfile
+    np = import_numpy()
+
+    if engine == "native":
+        protein_ids = []
+        value_batches = []
+        for batch_protein_ids, sequences in native_sequence_batches(records):
+            protein_ids.extend(batch_protein_ids)
+            value_batches.append(compute_native_values(np, sequences))
+        values = np.concatenate(value_batches) if value_batches else np.empty((0, len(pepstats_table_columns) - 1))
+    elif engine == "emboss":
+        with tempfile.TemporaryDirectory(prefix="PepStats_Tables_") as tmp_data_dir:
+            sequence_file = os.path.join(tmp_data_dir, "000.fa")
+            report_file = os.path.join(tmp_data_dir, "001.out")
+            with open(sequence_file, 'wb') as output_file:
+                for protein_id, sequence in read_sequence_records(records):
+                    output_file.write(b'>' + protein_id.encode() + b'\n' + sequence + b'\n')
+            if threads == 1:
+                run_pepstats(sequence_file, report_file)
+            else:
+                run_pepstats_sharded(sequence_file, report_file, os.path.join(tmp_data_dir, "000.shard"), threads)
+            entries = list(read_pepstats_report(report_file)) if os.path.isfile(report_file) else []
+        protein_ids = [entry[0] for entry in entries]
+        values = np.array([[columnar_value(value) for value in entry[1:]] for entry in entries], dtype=np.float64).reshape(-1, len(pepstats_table_columns) - 1)
+    else:
+        raise ValueError(f"Unknown engine: {engine} (expected native or emboss)")
+
+    table = np.empty(len(protein_ids), dtype=pepstats_array_dtype(np, max(map(len, protein_ids), default=1)))
+    table["Protein_ID"] = protein_ids
+    for index, column_name in enumerate(pepstats_table_columns[1:]):
+        table[column_name] = values[:, index]
+
+    if as_frame:
+        import pandas
+        return pandas.DataFrame(table)
+    return table
+
+# Bytes read and written by this process so far (Linux /proc/self/io), or None where the counters are unavailable
+def process_io_bytes():
+    try:
+        with open('/proc/self/io', 'r') as io_file:
+            counters = dict(line.split(': ') for line in io_file.read().splitlines())
+        return int(counters['rchar']), int(counters['wchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+# Peak resident set size in MB of this process and of its largest finished child process (pepstats), or None
+def peak_rss_mb():
+    if resource is None:
+        return None
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / scale
+
+# CPU time (user and system) used so far by this process and its finished child processes. The time of this process
+# is read from the same clock as measured_record_stream (time.process_time, finer than the clock ticks of os.times),
+# so that the time of the records consumed by a stage never exceeds the time of the stage
+def process_cpu_seconds():
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+# Measure a stage of the run: the block gets a metrics dict (it may set "records") that is completed with the
+# wall time, CPU time, peak RSS, bytes read/written and records per second, and passed to report at the end
+@contextlib.contextmanager
+def measure_stage(stage, report=None):
+    metrics = {"stage": stage, "records": None}
+    io_start = process_io_bytes()
+    cpu_start = process_cpu_seconds()
+    wall_start = time.perf_counter()
+    yield metrics
+    metrics["wall_seconds"] = time.perf_counter() - wall_start
+    metrics["cpu_seconds"] = process_cpu_seconds() - cpu_start
+    finish_stage_metrics(metrics, io_start, process_io_bytes())
+    if report is not None:
+        report(metrics)
+
+def finish_stage_metrics(metrics, io_start, io_stop):
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    metrics["bytes_read"] = io_stop[0] - io_start[0] if io_start and io_stop else None
+    metrics["bytes_written"] = io_stop[1] - io_start[1] if io_start and io_stop else None
+    records = metrics["records"]
+    metrics["records_per_second"] = records / metrics["wall_seconds"] if records is not None and metrics["wall_seconds"] > 0 else None
+
+# Pass records through, accumulating in metrics the time spent producing them (the streamed extraction stage, whose
+# work is interleaved with the table writers consuming the records). The counters start at zero even when the
+# records are never read (every protein taken from the result cache).
+def measured_records(records, metrics):
+    metrics.update(records=0, wall_seconds=0.0, cpu_seconds=0.0)
+    return measured_record_stream(iter(records), metrics)
+
+def measured_record_stream(records, metrics):
+    while True:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        record = next(records, None)
+        metrics["wall_seconds"] += time.perf_counter() - wall_start
+        metrics["cpu_seconds"] += time.process_time() - cpu_start
+        if record is None:
+            return
+        metrics["records"] += 1
+        yield record
+
+# One log line per stage
+def format_stage_metrics(metrics):
+    stage = f"{metrics['stage']} ({metrics['proteome']})" if "proteome" in metrics else metrics['stage']
+    line = f"\tStage {stage}:\twall {metrics['wall_seconds']:.3f} s, CPU {metrics['cpu_seconds']:.3f} s"
+    if metrics["peak_rss_mb"] is not None:
+        line += f", peak RSS {metrics['peak_rss_mb']:.1f} MB"
+    if metrics["bytes_read"] is not None:
+        line += f", read {metrics['bytes_read']} bytes, written {metrics['bytes_written']} bytes"
+    if metrics["records"] is not None:
+        line += f", {metrics['records']} records"
+    if metrics["records_per_second"] is not None:
+        line += f" ({metrics['records_per_second']:.1f} records/s)"
+    return line
+
+# Run the complete analysis of a proteome file and write <output_prefix>.00_Main_PepStats_Analysis,
+# .01_PepStats_Table_01, .02_PepStats_Table_02 (plus the optional validation and columnar files),
+# using tmp_data_dir for intermediate files. With resume, the proteome is analyzed in chunks of chunk_size proteins
+# kept in <output_prefix>.chunks and listed in <output_prefix>.manifest until the tables are written, so a restarted
+# run only analyzes the missing chunks. The proteome file may be compressed or "-" (standard input, read once, so
+# not with resume or the validate engine), and output_compression ("gzip" or "zstd") compresses the TSV outputs.
+# pepstats_report is a report of the proteome computed beforehand, used instead of running pepstats. binary_index
+# also writes <output_prefix>.05_PepStats_Index (see write_pepstats_index), never compressed so it can be mapped.
+# pipelined overlaps pepstats with the extraction (see read_pepstats_pipelined); resume and pepstats_report take
+# precedence over it. columns selects the Table_01 columns (see select_pepstats_columns), Protein_ID first; the
+# native engine computes the v1.0.0 columns only. previous is a (Table_01, FASTA) pair of files of the previous release
+# of the proteome (see read_previous_release): only the sequences it does not hold are analyzed, the other rows are
+# reused, and the added, removed and changed proteins are written to <output_prefix>.06_PepStats_Delta (see
+# assemble_delta_records); not available with cache_dir, resume or the validate engine. With quarantine, proteins
+# are screened before the analysis (see screen_sequences), failed pepstats runs are retried in isolation (see
+# run_pepstats_checked) and records are checked during the extraction (see checked_records): malformed or failed
+# proteins are left out of the tables and written to <output_prefix>.07_PepStats_Quarantine with the reason, and
+# a summary is logged; not available with resume, and pipelined is ignored.
+# Progress messages are passed to log, and the metrics of every stage (see measure_stage) to stage_report.
+# Returns the number of proteins.
+def run_pepstats_tables(proteome_file, output_prefix, tmp_data_dir, engine="emboss", threads=1, max_memory=256,
+                        cache_dir=None, cache_size=4096, output_format="tsv", resume=False, chunk_size=10000, log=None,
+                        stage_report=None, output_compression=None, pepstats_report=None, binary_index=False,
+                        pipelined=False, columns=pepstats_table_columns, previous=None, quarantine=False):
+    log = log or (lambda message: None)
+    work_name = os.path.basename(output_prefix)
+    if engine == "native" and not set(columns) <= set(pepstats_table_columns):
+        raise ValueError(f"Column(s) not computed by the native engine: {', '.join(column_name for column_name in columns if column_name not in pepstats_table_columns)}")
+    if previous is not None and (cache_dir is not None or resume or engine == "validate"):
+        raise ValueError("A previous release is not available with a result cache, a resumable run or the validate engine")
+    if quarantine and resume:
+        raise ValueError("Quarantine is not available with a resumable run")
+    # Batch and resumed runs get their pepstats reports otherwise, the native engine does not run pepstats, and
+    # quarantined runs retry failed pepstats runs from their sequence files
+    pipelined = pipelined and engine != "native" and pepstats_report is None and not resume and not quarantine
+
+    # File and file paths
+    file_000 = os.path.join(tmp_data_dir, f"000_{work_name}.fa")
+    file_001 = os.path.join(tmp_data_dir, f"001_{work_name}.out")
+    file_002 = os.path.join(tmp_data_dir, f"002_{work_name}.out")
+    file_003 = os.path.join(tmp_data_dir, f"003_{work_name}.out")
+    file_004 = os.path.join(tmp_data_dir, f"004_{work_name}.out")
+    file_005 = os.path.join(tmp_data_dir, f"005_{work_name}.{output_format}")
+    file_006 = os.path.join(tmp_data_dir, f"006_{work_name}.index")
+    file_007 = os.path.join(tmp_data_dir, f"007_{work_name}.out")
+    file_008 = os.path.join(tmp_data_dir, f"008_{work_name}.out")
+    file_009 = os.path.join(tmp_data_dir, f"009_{work_name}.fa")
+
+    # With quarantine, every malformed or failed protein is written once to file_008 with its reason (through one
+    # handle, open until the outputs are moved), and only the screened proteins (file_009) are analyzed. Without it,
+    # quarantine_protein is None, which the pepstats runners take as no quarantine
+    pepstats_retries = 0
+    if quarantine:
+        quarantined_ids = set()
+        quarantine_counts = {}
+        quarantine_lock = threading.Lock()
+        quarantine_file = open(file_008, 'w')
+        quarantine_file.write("Protein_ID\tStage\tReason\n")
+
+        def record_quarantined_protein(protein_id, stage, reason):
+            with quarantine_lock:
+                if protein_id in quarantined_ids:
+                    return
+                quarantined_ids.add(protein_id)
+                quarantine_counts[stage] = quarantine_counts.get(stage, 0) + 1
+                quarantine_file.write(f"{protein_id}\t{stage}\t{reason}\n")
+
+        quarantine_protein = record_quarantined_protein
+
+        with measure_stage("screening", stage_report) as stage:
+            screened_proteins, screened_out = screen_sequences(proteome_file, file_009, quarantine_protein)
+            proteome_file = file_009
+            stage["records"] = screened_proteins + screened_out
+        log(f"\nQuarantine Screening: {screened_proteins} proteins passed, {screened_out} quarantined")
+    else:
+        quarantine_protein = None
+
+    # With a result cache, only the sequences missing from the cache (file_000) are analyzed
+    sequence_file = proteome_file
+    if cache_dir is not None:
+        with measure_stage("cache_lookup", stage_report) as stage:
+            cache_connection = open_result_cache(cache_dir)
+            cache_engine_version = result_cache_engine_version(engine, columns)
+            plan_file = os.path.join(tmp_data_dir, f"000_{work_name}.plan")
+            sequence_file = file_000
+            cache_hits, cache_misses = plan_cached_run(cache_connection, cache_engine_version, proteome_file, plan_file, sequence_file)
+            stage["records"] = cache_hits + cache_misses
+        log(f"\nResult Cache Engine Version: {cache_engine_version}")
+        log(f"Result Cache Hits: {cache_hits}")
+        log(f"Result Cache Misses: {cache_misses}")
+        # With every protein cached there is nothing to pipeline
+        pipelined = pipelined and cache_misses > 0
+
+    # With a previous release, only the sequences missing from it (file_000) are analyzed
+    if previous is not None:
+        with measure_stage("delta_plan", stage_report) as stage:
+            previous_ids, previous_values = read_previous_release(*previous, columns)
+            delta_plan_file = os.path.join(tmp_data_dir, f"000_{work_name}.delta")
+            sequence_file = file_000
+            delta_counts = plan_delta_run(previous_ids, previous_values, proteome_file, delta_plan_file, sequence_file)
+            stage["records"] = delta_counts["unchanged"] + delta_counts["added"] + delta_counts["changed"]
+        log(f"\nPrevious Release: {len(previous_ids)} proteins ({previous[0]})")
+        log(f"Delta: {delta_counts['unchanged']} unchanged, {delta_counts['added']} added, {delta_counts['changed']} changed, {delta_counts['removed']} removed")
+        log(f"Delta Proteins Computed: {delta_counts['computed']}")
+        pipelined = pipelined and delta_counts["computed"] > 0
+
+    # Batch runs pass the pepstats report of the proteome, computed in the shared pool (see run_pepstats_batch)
+    if pepstats_report is not None:
+        shutil.move(pepstats_report, file_001)
+
+    # Resumable runs analyze the proteome chunk by chunk, keeping the finished chunks in the working directory
+    elif resume:
+        chunk_dir = f"{output_prefix}.chunks"
+        manifest_file = f"{output_prefix}.manifest"
+        with measure_stage("chunks", stage_report):
+            chunk_outputs, skipped_chunks = run_resumable_chunks(sequence_file, chunk_dir, manifest_file, "native" if engine == "native" else "emboss", threads, chunk_size)
+            if engine != "native":
+                with open(file_001, 'w') as merged_file:
+                    for chunk_output in chunk_outputs:
+                        with open(chunk_output, 'r') as chunk_report:
+                            shutil.copyfileobj(chunk_report, merged_file)
+        log(f"\nResumable Run Chunks: {len(chunk_outputs)} ({skipped_chunks} completed by a previous run)")
+
+    # Otherwise pepstats analyzes the whole sequence file at once (the native engine does not run pepstats), unless
+    # the run is pipelined, where pepstats runs while its report is extracted
+    elif engine != "native" and not pipelined:
+        with measure_stage("pepstats", stage_report):
+            if (cache_dir is not None and cache_misses == 0) or (previous is not None and delta_counts["computed"] == 0):
+                open(file_001, 'w').close()
+            elif threads == 1 and quarantine:
+                pepstats_retries = int(run_pepstats_checked(sequence_file, file_001, quarantine_protein))
+            elif threads == 1:
+                run_pepstats(sequence_file, file_001)
+            else:
+                shard_prefix = os.path.join(tmp_data_dir, f"000_{work_name}.shard")
+                pepstats_retries = run_pepstats_sharded(sequence_file, file_001, shard_prefix, threads, quarantine_protein)
+
+    # Stream records from the selected engine straight into Table_01 (file_002) and Table_02 (file_003)
+    # (extraction_inputs are the files the extraction reads, extraction_outputs the files it writes)
+    extraction_outputs = []
+    if engine == "native" and resume:
+        records = select_native_columns(read_chunk_rows(chunk_outputs), columns)
+        extraction_inputs = chunk_outputs
+    elif engine == "native":
+        # NumPy is imported in its own stage before the tables are written, so that the time and the files read by
+        # the import are counted neither as table_01 work nor as unmeasured startup
+        with measure_stage("numpy_import", stage_report):
+            import_numpy()
+        records = select_native_columns(compute_native_pepstats(sequence_file), columns)
+        extraction_inputs = [sequence_file]
+    elif pipelined:
+        records = read_pepstats_pipelined(sequence_file, file_001, threads, columns=columns)
+        extraction_inputs = [sequence_file, file_001]
+        extraction_outputs = [file_001]
+    else:
+        records = read_pepstats_report(file_001, columns)
+        extraction_inputs = [file_001]
+
+    # The extraction (or native computation) is consumed by the table writers, so its time is measured per record
+    # and the bytes it reads and writes are the sizes of its input and output files
+    if engine == "native" and not resume:
+        extraction_metrics = {"stage": "native"}
+    elif pipelined:
+        extraction_metrics = {"stage": "pepstats_pipelined"}
+    else:
+        extraction_metrics = {"stage": "extraction"}
+    records = measured_records(records, extraction_metrics)
+    if quarantine:
+        records = checked_records(records, (protein_id for protein_id, _ in read_fasta_records(sequence_file)), quarantine_protein, columns)
+
+    if cache_dir is not None:
+        records = assemble_cached_records(cache_connection, cache_engine_version, plan_file, records)
+    if previous is not None:
+        records = assemble_delta_records(previous_ids, previous_values, delta_plan_file, records, file_007, columns)
+    if quarantine:
+        records = (record for record in records if record is not None)
+
+    if output_format != "tsv":
+        records = write_columnar_records(records, file_005, output_format, columns=columns)
+
+    spill_prefix = os.path.join(tmp_data_dir, f"003_{work_name}.column")
+    table_01_metrics = {}
+    with measure_stage("table_01", lambda metrics: table_01_metrics.update(metrics)) as stage:
+        number_of_records = write_table_01_and_spills(records, file_002, spill_prefix, max_memory, columns)
+        stage["records"] = number_of_records
+    extraction_bytes = (sum(map(os.path.getsize, extraction_inputs)), sum(map(os.path.getsize, extraction_outputs)))
+    finish_stage_metrics(extraction_metrics, (0, 0), extraction_bytes)
+    # Table_01 is reported without the time spent in the extraction it consumed, nor the bytes the extraction read
+    # and wrote, so that the stages add up to the run
+    table_01_metrics["wall_seconds"] = max(0.0, table_01_metrics["wall_seconds"] - extraction_metrics["wall_seconds"])
+    table_01_metrics["cpu_seconds"] = max(0.0, table_01_metrics["cpu_seconds"] - extraction_metrics["cpu_seconds"])
+    if table_01_metrics["bytes_read"] is not None:
+        table_01_metrics["bytes_read"] = max(0, table_01_metrics["bytes_read"] - extraction_bytes[0])
+        table_01_metrics["bytes_written"] = max(0, table_01_metrics["bytes_written"] - extraction_bytes[1])
+    table_01_metrics["records_per_second"] = number_of_records / table_01_metrics["wall_seconds"] if table_01_metrics["wall_seconds"] > 0 else None
+    if stage_report is not None:
+        stage_report(extraction_metrics)
+        stage_report(table_01_metrics)
+
+    with measure_stage("table_02", stage_report) as stage:
+        assemble_table_02(file_003, spill_prefix, max_memory, columns)
+        stage["records"] = number_of_records
+    log(f"\tProteins Tabulated:\t{number_of_records}")
+
+    if binary_index:
+        with measure_stage("index", stage_report) as stage:
+            stage["records"] = write_pepstats_index(file_002, file_006)
+
+    if cache_dir is not None:
+        with measure_stage("cache_eviction", stage_report):
+            cache_evicted = evict_result_cache(cache_connection, cache_size)
+            cache_connection.close()
+        log(f"Result Cache Evicted: {cache_evicted}")
+
+    if engine == "validate":
+        with measure_stage("validation", stage_report) as stage:
+            validated_proteins, validation_mismatches = validate_native_against_emboss(read_pepstats_report(file_001), compute_native_pepstats(proteome_file), file_004)
+            move_output(file_004, f"{output_prefix}.03_PepStats_Validation", output_compression)
+            stage["records"] = validated_proteins
+        log(f"\nNative Engine Validation: {validated_proteins} proteins compared, {validation_mismatches} values outside tolerance")
+
+    with measure_stage("moves", stage_report):
+        if os.path.isfile(file_001):
+            move_output(file_001, f"{output_prefix}.00_Main_PepStats_Analysis", output_compression)
+        move_output(file_002, f"{output_prefix}.01_PepStats_Table_01", output_compression)
+        move_output(file_003, f"{output_prefix}.02_PepStats_Table_02", output_compression)
+        if output_format != "tsv":
+            shutil.move(file_005, f"{output_prefix}.01_PepStats_Table_01.{output_format}")
+        if binary_index:
+            shutil.move(file_006, f"{output_prefix}.05_PepStats_Index")
+        if previous is not None:
+            move_output(file_007, f"{output_prefix}.06_PepStats_Delta", output_compression)
+        if quarantine:
+            quarantine_file.close()
+            move_output(file_008, f"{output_prefix}.07_PepStats_Quarantine", output_compression)
+            os.remove(file_009)
+
+        # The chunks are no longer needed once the tables are written
+        if resume:
+            shutil.rmtree(chunk_dir)
+            os.remove(manifest_file)
+
+    if quarantine:
+        log("\nQuarantine Summary:")
+        log(f"\tProteins Tabulated:\t{number_of_records}")
+        log(f"\tProteins Quarantined:\t{len(quarantined_ids)}")
+        for stage_name in ("screening", "pepstats", "extraction"):
+            log(f"\t  at {stage_name}:\t{quarantine_counts.get(stage_name, 0)}")
+        log(f"\tpepstats Runs Retried:\t{pepstats_retries}")
+
+    return number_of_records
+
+# Proteome files of a batch: a manifest file (one proteome per line, relative paths are relative to the manifest,
+# blank lines and lines starting with # are ignored) or a glob pattern, expanded in sorted order
+def list_batch_proteomes(batch):
+    import glob
+    if os.path.isfile(batch):
+        manifest_dir = os.path.dirname(batch)
+        with open(batch, 'r') as manifest:
+            lines = [line.strip() for line in manifest]
+        proteome_files = [os.path.join(manifest_dir, line) for line in lines if line and not line.startswith('#')]
+    else:
+        proteome_files = sorted(glob.glob(os.path.expanduser(batch)))
+    if not proteome_files:
+        raise ValueError(f"No proteome files found in batch: {batch}")
+    names = [os.path.basename(proteome_file) for proteome_file in proteome_files]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Proteome file names must be unique within a batch: {', '.join(duplicates)}")
+    return proteome_files
+
+# Cut a batch of proteomes into pepstats work units of about unit_size bytes of FASTA, in proteome order: large
+# proteomes are split over several units and small ones are packed into one. Yields (FASTA bytes, segments), where
+# each segment is [proteome index, Protein_IDs of the proteins pepstats reports, True once the proteome ends in this unit].
+def batch_work_units(proteome_files, unit_size):
+    unit = []
+    segments = []
+    size = 0
+    for index, proteome_file in enumerate(proteome_files):
+        for protein_id, sequence in read_fasta_records(proteome_file):
+            unit.append((protein_id, sequence))
+            size += len(protein_id) + len(sequence) + 3
+            if not segments or segments[-1][0] != index:
+                segments.append([index, [], False])
+            # pepstats does not report empty sequences
+            if sequence.rstrip(b'*'):
+                segments[-1][1].append(protein_id)
+            if size >= unit_size:
+                yield chunk_fasta_bytes(unit), segments
+                unit = []
+                segments = []
+                size = 0
+        if segments and segments[-1][0] == index:
+            segments[-1][2] = True
+        else:
+            segments.append([index, [], True])
+    if segments:
+        yield chunk_fasta_bytes(unit), segments
+
+# Distribute the records of a work unit report to the reports of its proteomes: each "PEPSTATS of <Protein_ID>"
+# record goes to the proteome of the next unit protein with that Protein_ID (see is_reported_protein_id), so a
+# protein missing from the report never moves a record to another proteome. Returns the (proteome index, Protein_ID)
+# of the unit proteins missing from the report
+def split_pepstats_report(report_file, segments, proteome_reports):
+    unit_proteins = [(index, protein_id) for index, protein_ids, _ in segments for protein_id in protein_ids]
+    missing = []
+    position = 0
+    output_index = None
+    output_file = None
+    with open(report_file, 'r') as input_file:
+        for line in input_file:
+            if line.startswith("PEPSTATS of "):
+                report_id = line.split()[2]
+                match = next((match for match in range(position, len(unit_proteins)) if is_reported_protein_id(report_id, unit_proteins[match][1])), None)
+                if match is None:
+                    if output_file is not None:
+                        output_file.close()
+                    raise RuntimeError(f"pepstats reported a protein that is not in its batch work unit: {report_id}")
+                missing.extend(unit_proteins[position:match])
+                position = match + 1
+                if unit_proteins[match][0] != output_index:
+                    output_index = unit_proteins[match][0]
+                    if output_file is not None:
+                        output_file.close()
+                    output_file = open(proteome_reports[output_index], 'a')
+            if output_file is not None:
+                output_file.write(line)
+    if output_file is not None:
+        output_file.close()
+    missing.extend(unit_proteins[position:])
+    return missing
+
+# Combined Table_01 of a batch: the Table_01 rows of every proteome, after a Proteome column
+def write_batch_table(table_01_files, proteome_names, batch_table_file, output_compression=None, columns=pepstats_table_columns):
+    with open_compressed_output(batch_table_file, output_compression) as output_file:
+        output_file.write(('Proteome\t' + '\t'.join(columns) + '\n').encode())
+        for table_01_file, name in zip(table_01_files, proteome_names):
+            with open_sequence_input(table_01_file) as input_file:
+                next(input_file, None)
+                prefix = name.encode() + b'\t'
+                for line in input_file:
+                    output_file.write(prefix + line)
+
+# Analyze a batch of proteomes with one shared pool of threads pepstats processes: the proteomes are cut into work
+# units (see batch_work_units) analyzed in parallel, and each proteome is tabulated (run_pepstats_tables, writing
+# to its output prefix) as soon as its last unit is done, while the pool carries on with the next units.
+# The native engine tabulates the proteomes in the pool directly. A combined Table_01 with a Proteome column is
+# written to <batch_prefix>.04_PepStats_Batch_Table_01. proteome_logs are the log functions of each proteome, and
+# stage metrics carry the proteome name. columns selects the Table_01 columns of every proteome. Returns the number of proteins of each proteome.
+def run_pepstats_batch(proteome_files, output_prefixes, batch_prefix, tmp_data_dir, engine="emboss", threads=1,
+                       max_memory=256, output_format="tsv", output_compression=None, binary_index=False, unit_size=None,
+                       log=None, proteome_logs=None, stage_report=None, columns=pepstats_table_columns):
+    from concurrent.futures import ThreadPoolExecutor
+    log = log or (lambda message: None)
+    proteome_names = [proteome_name(proteome_file) for proteome_file in proteome_files]
+    proteome_logs = proteome_logs or [None] * len(proteome_files)
+    numbers_of_records = [None] * len(proteome_files)
+
+    def tabulate(index, pepstats_report=None):
+        def proteome_stage_report(metrics):
+            metrics["proteome"] = proteome_names[index]
+            if proteome_logs[index] is not None:
+                proteome_logs[index](format_stage_metrics(metrics))
+            if stage_report is not None:
+                stage_report(metrics)
+        numbers_of_records[index] = run_pepstats_tables(
+            proteome_files[index], output_prefixes[index], tmp_data_dir, engine=engine, max_memory=max_memory,
+            output_format=output_format, log=proteome_logs[index], stage_report=proteome_stage_report,
+            output_compression=output_compression, pepstats_report=pepstats_report, binary_index=binary_index,
+            columns=columns,
+        )
+        log(f"\tProteome Tabulated:\t{proteome_names[index]} ({numbers_of_records[index]} proteins)")
+
+    with measure_stage("batch", stage_report) as stage, ThreadPoolExecutor(max_workers=threads) as executor:
+        if engine == "native":
+            for future in [executor.submit(tabulate, index) for index in range(len(proteome_files))]:
+                future.result()
+        else:
+            # Units of a quarter of each process share of the batch, between 1 MB and 16 MB of FASTA
+            if unit_size is None:
+                batch_size = sum(os.path.getsize(proteome_file) for proteome_file in proteome_files)
+                unit_size = min(16 * 1024 * 1024, max(1024 * 1024, batch_size // (4 * threads)))
+            proteome_reports = [os.path.join(tmp_data_dir, f"001_{os.path.basename(output_prefix)}.batch.out") for output_prefix in output_prefixes]
+            for proteome_report in proteome_reports:
+                open(proteome_report, 'w').close()
+
+            # Units finish in any order but are distributed in order, so every proteome report keeps its protein order
+            def finish_oldest_unit():
+                future, segments, unit_report, unit_index = pending.popleft()
+                status = future.result()
+                if status:
+                    unit_proteomes = ', '.join(proteome_names[index] for index, _, _ in segments)
+                    raise RuntimeError(f"pepstats failed (exit status {status}) on batch work unit {unit_index} ({unit_proteomes})")
+                for index, protein_id in split_pepstats_report(unit_report, segments, proteome_reports):
+                    log(f"\tMissing from the pepstats Report:\t{protein_id} ({proteome_names[index]})")
+                    if proteome_logs[index] is not None:
+                        proteome_logs[index](f"\tMissing from the pepstats Report:\t{protein_id}")
+                os.remove(unit_report)
+                for index, _, proteome_complete in segments:
+                    if proteome_complete:
+                        tabulate(index, proteome_reports[index])
+
+            pending = deque()
+            number_of_units = 0
+            for unit_index, (unit_fasta, segments) in enumerate(batch_work_units(proteome_files, unit_size)):
+                unit_report = os.path.join(tmp_data_dir, f"001_unit_{unit_index:06d}.out")
+                if unit_fasta:
+                    future = executor.submit(run_pepstats_piped, unit_fasta, unit_report)
+                else:
+                    open(unit_report, 'w').close()
+                    future = executor.submit(lambda: 0)
+                pending.append((future, segments, unit_report, unit_index))
+                number_of_units += 1
+                # Keep at most two units per process in memory
+                while len(pending) >= 2 * threads:
+                    finish_oldest_unit()
+            while pending:
+                finish_oldest_unit()
+            log(f"\tBatch Work Units:\t{number_of_units} (about {unit_size} bytes of FASTA each)")
+        stage["records"] = sum(numbers_of_records)
+
+    batch_table_file = compressed_file_name(f"{batch_prefix}.04_PepStats_Batch_Table_01", output_compression)
+    table_01_files = [compressed_file_name(f"{output_prefix}.01_PepStats_Table_01", output_compression) for output_prefix in output_prefixes]
+    write_batch_table(table_01_files, proteome_names, batch_table_file, output_compression, columns)
+    log(f"\tBatch Table Written to:\t{batch_table_file}")
+
+    return numbers_of_records